@@ -1,15 +1,32 @@
+import hashlib
+
 from django.conf import settings
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.sites.models import Site
-from django.db import models
+from django.db import models, router, transaction
 from django.urls import reverse
 from django.utils import timezone
+from django.utils.http import base36_to_int, int_to_base36
 from django.utils.translation import gettext_lazy as _
 
 from .managers import CommentManager
 
 COMMENT_MAX_LENGTH = getattr(settings, 'COMMENT_MAX_LENGTH', 3000)
+COMMENT_HASH_LENGTH = 16
+THREAD_PATH_SEGMENT_LENGTH = 10
+THREAD_PATH_MAX_LENGTH = 250
+# The depth of the deepest replies, whose path holds the most segments.
+MAX_THREAD_DEPTH = THREAD_PATH_MAX_LENGTH // THREAD_PATH_SEGMENT_LENGTH - 1
+
+
+def get_comment_hash(text):
+    """
+    Return a short hash of the comment text, ignoring case and whitespace, to
+    find identical comments without comparing their full text.
+    """
+    normalized = " ".join(text.casefold().split())
+    return hashlib.sha256(normalized.encode()).hexdigest()[:COMMENT_HASH_LENGTH]
 
 
 class BaseCommentAbstractModel(models.Model):
@@ -58,6 +75,8 @@ class CommentAbstractModel(BaseCommentAbstractModel):
     user_url = models.URLField(_("user's URL"), blank=True)
 
     comment = models.TextField(_('comment'), max_length=COMMENT_MAX_LENGTH)
+    comment_hash = models.CharField(_('comment hash'), max_length=COMMENT_HASH_LENGTH,
+                                    blank=True, db_index=True, editable=False)
 
     # Metadata about the comment
     submit_date = models.DateTimeField(_('date/time submitted'), default=None, db_index=True)
@@ -86,6 +105,10 @@ class CommentAbstractModel(BaseCommentAbstractModel):
     def save(self, *args, **kwargs):
         if self.submit_date is None:
             self.submit_date = timezone.now()
+        self.comment_hash = get_comment_hash(self.comment)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'comment' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'comment_hash'}
         super().save(*args, **kwargs)
 
     def _get_userinfo(self):
@@ -109,8 +132,9 @@ class CommentAbstractModel(BaseCommentAbstractModel):
                 # If the user has a full name, use that for the user name.
                 # However, a given user_name overrides the raw user.username,
                 # so only use that if this comment has no associated name.
-                if u.get_full_name():
-                    userinfo["name"] = self.user.get_full_name()
+                full_name = u.get_full_name()
+                if full_name:
+                    userinfo["name"] = full_name
                 elif not self.user_name:
                     userinfo["name"] = u.get_username()
             self._userinfo = userinfo
@@ -163,3 +187,81 @@ class CommentAbstractModel(BaseCommentAbstractModel):
             'url': self.get_absolute_url()
         }
         return _('Posted by %(user)s at %(date)s\n\n%(comment)s\n\nhttp://%(domain)s%(url)s') % d
+
+
+class ThreadedCommentAbstractModel(CommentAbstractModel):
+    """
+    A comment which may reply to another comment on the same object.
+
+    ``thread_path`` is the materialized path of the comment: the primary keys
+    of its ancestors and of itself, base 36 encoded to a fixed width. Ordering
+    the comments of an object by it lists each thread depth first, with the
+    replies in posting order, and the replies to a comment are a range of it.
+    """
+    parent = models.ForeignKey('self', verbose_name=_('parent'), blank=True, null=True,
+                               related_name='replies', on_delete=models.CASCADE)
+    depth = models.PositiveSmallIntegerField(_('depth'), default=0, editable=False)
+    thread_path = models.CharField(_('thread path'), max_length=THREAD_PATH_MAX_LENGTH,
+                                   blank=True, editable=False)
+
+    class Meta(CommentAbstractModel.Meta):
+        abstract = True
+        indexes = [
+            # Matches the comment tree query: an object's comments in thread
+            # order are one index range scan, and so are a comment's replies.
+            # Index names are limited to 30 characters, so app labels and
+            # model names longer than 24 characters together need their own.
+            models.Index(fields=['content_type', 'object_pk', 'site', 'thread_path'],
+                         name='%(app_label)s_%(class)s_tree'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.thread_path:
+            super().save(*args, **kwargs)
+            return
+        if self.parent_id is not None:
+            parent = self.parent
+            parent_target = (parent.content_type_id, parent.object_pk, parent.site_id)
+            if parent_target != (self.content_type_id, self.object_pk, self.site_id):
+                raise ValueError("A reply must be attached to the same object and site as its parent.")
+            if parent.depth >= MAX_THREAD_DEPTH:
+                raise ValueError("Replies can't be nested more than %d levels deep." % MAX_THREAD_DEPTH)
+            self.depth = parent.depth + 1
+        using = kwargs.get('using') or router.db_for_write(self.__class__, instance=self)
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
+            # The path ends with the primary key, only known once inserted.
+            self.thread_path = self.get_thread_path()
+            self.__class__._base_manager.using(using).filter(pk=self.pk).update(thread_path=self.thread_path)
+
+    def get_thread_path(self):
+        segment = int_to_base36(self.pk).zfill(THREAD_PATH_SEGMENT_LENGTH)
+        if self.parent_id is None:
+            return segment
+        return self.parent.thread_path + segment
+
+    def get_ancestors(self):
+        """
+        Return the comments this comment replies to, directly or not, from the
+        root of its thread.
+        """
+        pks = [
+            base36_to_int(self.thread_path[i:i + THREAD_PATH_SEGMENT_LENGTH])
+            for i in range(0, len(self.thread_path) - THREAD_PATH_SEGMENT_LENGTH, THREAD_PATH_SEGMENT_LENGTH)
+        ]
+        return self.__class__._default_manager.filter(pk__in=pks).order_by('thread_path')
+
+    def get_descendants(self):
+        """
+        Return the replies to this comment, directly or not, in thread order.
+        """
+        # Base 36 digits sort before "z", so the paths starting with this
+        # comment's are the range up to its path padded with "z".
+        last_path = self.thread_path.ljust(THREAD_PATH_MAX_LENGTH, 'z')
+        return self.__class__._default_manager.filter(
+            content_type_id=self.content_type_id,
+            object_pk=self.object_pk,
+            site_id=self.site_id,
+            thread_path__gt=self.thread_path,
+            thread_path__lte=last_path,
+        ).order_by('thread_path')
@@ -3,7 +3,7 @@ from django.contrib.auth import get_user_model
 from django.utils.translation import gettext_lazy as _, ngettext
 
 from django_comments import get_model
-from django_comments.views.moderation import perform_flag, perform_approve, perform_delete
+from django_comments.views.moderation import perform_bulk_flag, perform_bulk_approve, perform_bulk_delete
 
 
 class UsernameSearch:
@@ -34,6 +34,7 @@ class CommentsAdmin(admin.ModelAdmin):
 
     list_display = ('name', 'content_type', 'object_pk', 'ip_address', 'submit_date', 'is_public', 'is_removed')
     list_filter = ('submit_date', 'site', 'is_public', 'is_removed')
+    list_select_related = ('user', 'content_type')
     date_hierarchy = 'submit_date'
     ordering = ('-submit_date',)
     raw_id_fields = ('user',)
@@ -53,19 +54,19 @@ class CommentsAdmin(admin.ModelAdmin):
         return actions
 
     def flag_comments(self, request, queryset):
-        self._bulk_flag(request, queryset, perform_flag,
+        self._bulk_flag(request, queryset, perform_bulk_flag,
                         lambda n: ngettext('flagged', 'flagged', n))
 
     flag_comments.short_description = _("Flag selected comments")
 
     def approve_comments(self, request, queryset):
-        self._bulk_flag(request, queryset, perform_approve,
+        self._bulk_flag(request, queryset, perform_bulk_approve,
                         lambda n: ngettext('approved', 'approved', n))
 
     approve_comments.short_description = _("Approve selected comments")
 
     def remove_comments(self, request, queryset):
-        self._bulk_flag(request, queryset, perform_delete,
+        self._bulk_flag(request, queryset, perform_bulk_delete,
                         lambda n: ngettext('removed', 'removed', n))
 
     remove_comments.short_description = _("Remove selected comments")
@@ -75,10 +76,7 @@ class CommentsAdmin(admin.ModelAdmin):
         Flag, approve, or remove some comments from an admin action. Actually
         calls the `action` argument to perform the heavy lifting.
         """
-        n_comments = 0
-        for comment in queryset:
-            action(request, comment)
-            n_comments += 1
+        n_comments = action(request, queryset)
 
         msg = ngettext('%(count)s comment was successfully %(action)s.',
                         '%(count)s comments were successfully %(action)s.',
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class DjangoCommentsAdminConfig(AppConfig):
     default_auto_field = 'django.db.models.AutoField'
     name = 'django_comments'
+
+    def ready(self):
+        from django_comments import caching, counters, templating
+        caching.connect()
+        counters.connect()
+        templating.connect()
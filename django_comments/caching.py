@@ -0,0 +1,94 @@
+"""
+Caching of rendered comment lists and forms.
+
+Every object a comment can be attached to has a version number in the cache,
+which is part of the cache key of its rendered comment lists. Changing one of
+its comments bumps the version, so stale lists are never read again and simply
+expire.
+
+Comment forms rendered with placeholders for their per-object values are
+cached per content type; they don't depend on any comment, so they're never
+invalidated and simply expire.
+"""
+import time
+
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.db.models.signals import post_delete, post_save
+from django.utils.encoding import force_str
+
+import django_comments
+from django_comments import signals
+
+
+def get_version_key(content_type_id, object_pk, site_id):
+    return "django_comments.version.%s.%s.%s" % (content_type_id, force_str(object_pk), site_id)
+
+
+def get_version(content_type_id, object_pk, site_id):
+    """
+    Return the current version of the comments of an object.
+    """
+    key = get_version_key(content_type_id, object_pk, site_id)
+    version = cache.get(key)
+    if version is None:
+        # Start from the current time so that a version evicted from the
+        # cache can't be reused for a different set of comments.
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(comment):
+    """
+    Invalidate the cached comment lists of the object ``comment`` is attached
+    to.
+    """
+    bump_object_version(comment.content_type_id, comment.object_pk, comment.site_id)
+
+
+def bump_object_version(content_type_id, object_pk, site_id):
+    key = get_version_key(content_type_id, object_pk, site_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+
+
+def get_list_cache_key(content_type_id, object_pk, site_id, *vary_on):
+    """
+    Return the cache key of a rendered comment list. ``vary_on`` holds any
+    other value the rendered list depends on (e.g. pagination options).
+    """
+    version = get_version(content_type_id, object_pk, site_id)
+    return make_template_fragment_key(
+        "django_comments.list", [content_type_id, object_pk, site_id, version, *vary_on],
+    )
+
+
+def get_form_cache_key(content_type_id, *vary_on):
+    """
+    Return the cache key of a comment form rendered for a content type.
+    ``vary_on`` holds any other value the rendered form depends on.
+    """
+    return make_template_fragment_key("django_comments.form", [content_type_id, *vary_on])
+
+
+def comment_changed(sender, comment=None, instance=None, **kwargs):
+    bump_version(comment or instance)
+
+
+def comments_changed(sender, comment_ids, **kwargs):
+    objects = sender._default_manager.filter(pk__in=comment_ids).order_by().values_list(
+        'content_type', 'object_pk', 'site',
+    ).distinct()
+    for content_type_id, object_pk, site_id in objects:
+        bump_object_version(content_type_id, object_pk, site_id)
+
+
+def connect():
+    signals.comment_was_posted.connect(comment_changed, sender=django_comments.get_model())
+    signals.comment_was_flagged.connect(comment_changed, sender=django_comments.get_model())
+    signals.comments_were_flagged.connect(comments_changed, sender=django_comments.get_model())
+    post_save.connect(comment_changed, sender=django_comments.get_model())
+    post_delete.connect(comment_changed, sender=django_comments.get_model())
@@ -0,0 +1,89 @@
+"""
+Maintenance of the denormalized ``CommentCounter`` table.
+
+Only comments that are public and not removed are counted. The receivers
+below and the bulk moderation functions keep the counters up to date when
+``COMMENTS_USE_COUNTERS`` is enabled; changes made behind the framework's
+back (e.g. editing ``is_public`` through a raw ``QuerySet.update()``) can be
+repaired with the ``rebuild_comment_counters`` management command.
+"""
+from django.db.models import Count
+from django.db.models.signals import post_delete, post_save, pre_save
+
+import django_comments
+from django_comments.managers import counters_enabled
+from django_comments.models import CommentCounter
+
+
+def is_counted(comment):
+    """
+    Return whether ``comment`` is included in its object's counter.
+    """
+    return getattr(comment, 'is_public', True) and not getattr(comment, 'is_removed', False)
+
+
+def update_counter(comment, delta):
+    """
+    Add ``delta`` to the counter of the object ``comment`` is attached to.
+    """
+    if not counters_enabled():
+        return
+    CommentCounter.objects.adjust(comment.content_type_id, comment.object_pk, comment.site_id, delta)
+
+
+def update_counters(queryset, delta):
+    """
+    Add ``delta`` to the counters of the objects the comments in
+    ``queryset`` are attached to, once per comment.
+    """
+    if not counters_enabled():
+        return
+    rows = queryset.order_by().values_list('content_type', 'object_pk', 'site').annotate(count=Count('pk'))
+    for content_type_id, object_pk, site_id, count in rows:
+        CommentCounter.objects.adjust(content_type_id, object_pk, site_id, delta * count)
+
+
+def get_counted_target(comment):
+    """
+    Return the content type, object and site of the counter ``comment`` is
+    included in, or ``None`` if it isn't counted.
+    """
+    if not is_counted(comment):
+        return None
+    return comment.content_type_id, comment.object_pk, comment.site_id
+
+
+def comment_saving(sender, instance, raw, using, **kwargs):
+    # Remember the counter the stored row is included in, so that saving a
+    # comment again (e.g. a duplicate post returning the existing comment)
+    # doesn't count it twice, and changing is_public or is_removed (e.g. in
+    # the admin) moves it in or out of its counter.
+    instance._counted_target = None
+    if raw or instance._state.adding or not counters_enabled():
+        return
+    stored = sender._base_manager.using(using).filter(pk=instance.pk).first()
+    if stored is not None:
+        instance._counted_target = get_counted_target(stored)
+
+
+def comment_saved(sender, instance, raw, **kwargs):
+    if raw or not counters_enabled():
+        return
+    before = getattr(instance, '_counted_target', None)
+    after = get_counted_target(instance)
+    if before != after:
+        if before is not None:
+            CommentCounter.objects.adjust(*before, -1)
+        if after is not None:
+            CommentCounter.objects.adjust(*after, 1)
+
+
+def comment_deleted(sender, instance, **kwargs):
+    if is_counted(instance):
+        update_counter(instance, -1)
+
+
+def connect():
+    pre_save.connect(comment_saving, sender=django_comments.get_model())
+    post_save.connect(comment_saved, sender=django_comments.get_model())
+    post_delete.connect(comment_deleted, sender=django_comments.get_model())
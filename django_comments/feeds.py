@@ -22,7 +22,7 @@ class LatestCommentFeed(Feed):
         return _("Latest comments on %(site_name)s") % dict(site_name=self.site.name)
 
     def items(self):
-        qs = django_comments.get_model().objects.filter(
+        qs = django_comments.get_model().objects.with_related().filter(
             site__pk=self.site.pk,
             is_public=True,
             is_removed=False,
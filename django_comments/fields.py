@@ -0,0 +1,39 @@
+from django.contrib.contenttypes.fields import GenericRelation
+from django.db.models import Prefetch
+
+import django_comments
+
+
+class CommentsRelation(GenericRelation):
+    """
+    A reverse relation from a model to its comments, to be declared on the
+    models comments are attached to::
+
+        class Entry(models.Model):
+            ...
+            comments = CommentsRelation()
+
+    Like any ``GenericRelation``, deleting an object also deletes its
+    comments.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('object_id_field', 'object_pk')
+        kwargs.setdefault('content_type_field', 'content_type')
+        super().__init__(django_comments.get_model(), **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        del kwargs['to']
+        return name, path, args, kwargs
+
+
+def prefetch_comments(lookup='comments', to_attr=None, site_id=None):
+    """
+    Return a ``Prefetch`` of the visible comments (as shown by the template
+    tags) through a ``CommentsRelation``, ordered by submit date::
+
+        Entry.objects.prefetch_related(prefetch_comments())
+    """
+    queryset = django_comments.get_model().objects.visible(site_id).order_by('submit_date', 'pk')
+    return Prefetch(lookup, queryset=queryset, to_attr=to_attr)
@@ -1,19 +1,39 @@
+import datetime
+import functools
+import hashlib
+import hmac
 import time
 
 from django import forms
 from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
 from django.forms.utils import ErrorDict
-from django.utils.crypto import salted_hmac, constant_time_compare
-from django.utils.encoding import force_str
+from django.utils.crypto import constant_time_compare
+from django.utils.encoding import force_bytes
+from django.utils.functional import cached_property
 from django.utils.text import get_text_list
 from django.utils import timezone
 from django.utils.translation import pgettext_lazy, ngettext, gettext, gettext_lazy as _
 
 from . import get_model
+from .abstracts import MAX_THREAD_DEPTH, get_comment_hash
+from .profanities import get_profanity_matcher
 
 COMMENT_MAX_LENGTH = getattr(settings, 'COMMENT_MAX_LENGTH', 3000)
 DEFAULT_COMMENTS_TIMEOUT = getattr(settings, 'COMMENTS_TIMEOUT', (2 * 60 * 60))  # 2h
+SECURITY_HASH_KEY_SALT = "django.contrib.forms.CommentSecurityForm"
+
+
+@functools.lru_cache(maxsize=4)
+def _get_security_hash_key(secret):
+    # The key derivation of django.utils.crypto.salted_hmac().
+    return hashlib.sha1(force_bytes(SECURITY_HASH_KEY_SALT) + force_bytes(secret)).digest()
+
+
+@functools.lru_cache(maxsize=1024)
+def _get_security_hash(secret, value):
+    # Many forms are generated for the same object in the same second.
+    return hmac.new(_get_security_hash_key(secret), force_bytes(value), hashlib.sha1).hexdigest()
 
 
 class CommentSecurityForm(forms.Form):
@@ -40,6 +60,39 @@ class CommentSecurityForm(forms.Form):
                 errors[f] = self.errors[f]
         return errors
 
+    @classmethod
+    def verify_security_data(cls, data):
+        """
+        Return whether the timestamp and security hash submitted in ``data``
+        are valid, without building or cleaning the form, so forged or expired
+        posts can be rejected before the target is looked up.
+        """
+        timestamp = data.get("timestamp", "")
+        try:
+            if time.time() - int(timestamp) > DEFAULT_COMMENTS_TIMEOUT:
+                return False
+        except ValueError:
+            return False
+        form = cls.__new__(cls)
+        expected_hash = form.generate_security_hash(
+            content_type=data.get("content_type", ""),
+            object_pk=data.get("object_pk", ""),
+            timestamp=timestamp,
+        )
+        return constant_time_compare(expected_hash, data.get("security_hash", ""))
+
+    @classmethod
+    def can_verify_security_data(cls):
+        """
+        Return whether ``verify_security_data()`` checks the same things as
+        cleaning the form, i.e. whether the form doesn't override the cleaning
+        of the timestamp or security hash.
+        """
+        return all(
+            getattr(cls, name) is getattr(CommentSecurityForm, name)
+            for name in ('clean_timestamp', 'clean_security_hash')
+        )
+
     def clean_security_hash(self):
         """Check the security hash."""
         security_hash_dict = {
@@ -63,23 +116,43 @@ class CommentSecurityForm(forms.Form):
     def generate_security_data(self):
         """Generate a dict of security data for "initial" data."""
         timestamp = int(time.time())
+        content_type, object_pk = self._target_info
         security_dict = {
-            'content_type': str(self.target_object._meta),
-            'object_pk': str(self.target_object._get_pk_val()),
+            'content_type': content_type,
+            'object_pk': object_pk,
             'timestamp': str(timestamp),
             'security_hash': self.initial_security_hash(timestamp),
         }
         return security_dict
 
+    @classmethod
+    def security_data_for(cls, target_object):
+        """
+        Generate the security data of a form for ``target_object`` without
+        building the form itself, for filling in pre-rendered forms.
+        """
+        form = cls.__new__(cls)
+        form.target_object = target_object
+        return form.generate_security_data()
+
+    @cached_property
+    def _target_info(self):
+        """
+        The content type label and primary key of the target object, as
+        strings.
+        """
+        return str(self.target_object._meta), str(self.target_object._get_pk_val())
+
     def initial_security_hash(self, timestamp):
         """
         Generate the initial security hash from self.content_object
         and a (unix) timestamp.
         """
 
+        content_type, object_pk = self._target_info
         initial_security_dict = {
-            'content_type': str(self.target_object._meta),
-            'object_pk': str(self.target_object._get_pk_val()),
+            'content_type': content_type,
+            'object_pk': object_pk,
             'timestamp': str(timestamp),
         }
         return self.generate_security_hash(**initial_security_dict)
@@ -89,9 +162,8 @@ class CommentSecurityForm(forms.Form):
         Generate a HMAC security hash from the provided info.
         """
         info = (content_type, object_pk, timestamp)
-        key_salt = "django.contrib.forms.CommentSecurityForm"
         value = "-".join(info)
-        return salted_hmac(key_salt, value).hexdigest()
+        return _get_security_hash(settings.SECRET_KEY, value)
 
 
 class CommentDetailsForm(CommentSecurityForm):
@@ -120,6 +192,8 @@ class CommentDetailsForm(CommentSecurityForm):
         CommentModel = self.get_comment_model()
         new = CommentModel(**self.get_comment_create_data(site_id=site_id))
         new = self.check_for_duplicate_comment(new)
+        # Spare a query to whoever needs the target (e.g. the moderator).
+        CommentModel._meta.get_field('content_object').set_cached_value(new, self.target_object)
 
         return new
 
@@ -139,7 +213,7 @@ class CommentDetailsForm(CommentSecurityForm):
         """
         return dict(
             content_type=ContentType.objects.get_for_model(self.target_object),
-            object_pk=force_str(self.target_object._get_pk_val()),
+            object_pk=self._target_info[1],
             user_name=self.cleaned_data["name"],
             user_email=self.cleaned_data["email"],
             user_url=self.cleaned_data["url"],
@@ -155,18 +229,22 @@ class CommentDetailsForm(CommentSecurityForm):
         Check that a submitted comment isn't a duplicate. This might be caused
         by someone posting a comment twice. If it is a dup, silently return the *previous* comment.
         """
-        possible_duplicates = self.get_comment_model()._default_manager.using(
+        day = new.submit_date.replace(hour=0, minute=0, second=0, microsecond=0)
+        duplicates = self.get_comment_model()._default_manager.using(
             self.target_object._state.db
         ).filter(
-            content_type=new.content_type,
+            content_type_id=new.content_type_id,
             object_pk=new.object_pk,
             user_name=new.user_name,
             user_email=new.user_email,
             user_url=new.user_url,
+            submit_date__gte=day,
+            submit_date__lt=day + datetime.timedelta(days=1),
+            comment_hash=get_comment_hash(new.comment),
+            comment=new.comment,
         )
-        for old in possible_duplicates:
-            if old.submit_date.date() == new.submit_date.date() and old.comment == new.comment:
-                return old
+        for old in duplicates[:1]:
+            return old
 
         return new
 
@@ -178,7 +256,7 @@ class CommentDetailsForm(CommentSecurityForm):
         comment = self.cleaned_data["comment"]
         if (not getattr(settings, 'COMMENTS_ALLOW_PROFANITIES', False) and
                 getattr(settings, 'PROFANITIES_LIST', False)):
-            bad_words = [w for w in settings.PROFANITIES_LIST if w in comment.lower()]
+            bad_words = get_profanity_matcher().find(comment)
             if bad_words:
                 raise forms.ValidationError(ngettext(
                     "Watch your mouth! The word %s is not allowed here.",
@@ -200,3 +278,55 @@ class CommentForm(CommentDetailsForm):
         if value:
             raise forms.ValidationError(self.fields["honeypot"].label)
         return value
+
+
+class ThreadedCommentForm(CommentForm):
+    """
+    A comment form for models based on ``ThreadedCommentAbstractModel``, with
+    a hidden ``parent`` field holding the primary key of the comment replied
+    to, if any.
+    """
+    parent = forms.CharField(required=False, widget=forms.HiddenInput)
+
+    def __init__(self, target_object, parent=None, data=None, initial=None, **kwargs):
+        if parent is not None:
+            initial = dict(initial or {}, parent=parent.pk)
+        super().__init__(target_object, data=data, initial=initial, **kwargs)
+
+    def clean_parent(self):
+        """
+        Check the comment replied to is on the same object and site, and not
+        too deep.
+        """
+        value = self.cleaned_data["parent"]
+        if not value:
+            return None
+        model = self.get_comment_model()
+        parents = model._default_manager.filter(
+            content_type=ContentType.objects.get_for_model(self.target_object),
+            object_pk=self._target_info[1],
+        )
+        # Without SITE_ID, the site is only known from the request, when the
+        # comment is created.
+        site_id = getattr(settings, "SITE_ID", None)
+        if site_id:
+            parents = parents.filter(site_id=site_id)
+        try:
+            parent = parents.get(pk=value)
+        except (model.DoesNotExist, ValueError, forms.ValidationError):
+            raise forms.ValidationError(_("The comment you replied to doesn't exist."))
+        if parent.depth >= MAX_THREAD_DEPTH:
+            raise forms.ValidationError(_("You can't reply to this comment."))
+        return parent
+
+    def get_comment_create_data(self, site_id=None):
+        """
+        Add the parent to the data. Raise ``ValidationError`` if it's on
+        another site than the comment, which ``clean_parent()`` can't check
+        without ``SITE_ID``.
+        """
+        data = super().get_comment_create_data(site_id=site_id)
+        parent = data['parent'] = self.cleaned_data["parent"]
+        if parent is not None and parent.site_id != data['site_id']:
+            raise forms.ValidationError(_("The comment you replied to doesn't exist."))
+        return data
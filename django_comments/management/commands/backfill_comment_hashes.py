@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+import django_comments
+from django_comments.abstracts import get_comment_hash
+
+
+class Command(BaseCommand):
+    help = "Compute the comment hash of the comments saved without one."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', default=1000, type=int, dest='batch_size',
+            help='Number of comments to update per query (default: 1000)',
+        )
+
+    def handle(self, *args, **kwargs):
+        verbosity = kwargs['verbosity']
+        batch_size = kwargs['batch_size']
+        if batch_size < 1:
+            raise CommandError("--batch-size must be a positive integer.")
+
+        model = django_comments.get_model()
+        comments = model._default_manager.filter(comment_hash='').order_by('pk').only('pk', 'comment')
+        total = 0
+        last_pk = None
+        while True:
+            batch = comments if last_pk is None else comments.filter(pk__gt=last_pk)
+            batch = list(batch[:batch_size])
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+            for comment in batch:
+                comment.comment_hash = get_comment_hash(comment.comment)
+            model._default_manager.bulk_update(batch, ['comment_hash'])
+            total += len(batch)
+            if verbosity >= 2:
+                self.stdout.write("  %d comments updated" % total)
+
+        if verbosity >= 1:
+            self.stdout.write("Computed the hash of %d comments" % total)
@@ -1,8 +1,31 @@
-from django.core.management.base import BaseCommand
+from concurrent.futures import ProcessPoolExecutor
+from io import StringIO
+
+import django
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, transaction
 
 from django_comments.models import Comment
 
 
+def check_content_type(ctype_id, options):
+    """
+    Delete the stale comments on objects of one content type in a worker
+    process. Returns the number of stale comments and the command's output.
+    """
+    out = StringIO()
+    command = Command(stdout=out)
+    command.configure(options)
+    try:
+        ctype = ContentType.objects.get_for_id(ctype_id)
+        n_stale = command.handle_content_type(ctype, Comment.objects.filter(content_type=ctype))
+    finally:
+        connections.close_all()
+    return n_stale, out.getvalue()
+
+
 class Command(BaseCommand):
     help = ("Remove comments for which the related objects "
             "don't exist anymore!")
@@ -12,31 +35,175 @@ class Command(BaseCommand):
             '-y', '--yes', default='x', action='store_const', const='y',
             dest='answer', help='Automatically confirm deletion',
         )
+        parser.add_argument(
+            '--batch-size', default=1000, type=int, dest='batch_size',
+            help='Number of objects checked and of comments deleted at once (default: 1000)',
+        )
+        parser.add_argument(
+            '--content-type', action='append', dest='content_types', metavar='APP_LABEL.MODEL',
+            help='Only check comments on this content type (can be repeated)',
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true', dest='dry_run',
+            help="Report stale comments without deleting them",
+        )
+        parser.add_argument(
+            '--workers', default=1, type=int, dest='workers',
+            help='Number of processes checking content types in parallel (default: 1)',
+        )
 
-    def handle(self, *args, **kwargs):
-        verbose = kwargs['verbosity'] >= 1
-        answer = kwargs['answer']
+    def configure(self, options):
+        self.verbosity = options['verbosity']
+        self.answer = options['answer']
+        self.batch_size = options['batch_size']
+        self.dry_run = options['dry_run']
 
         # -v0 sets --yes
-        if not verbose:
-            answer = 'y'
-
-        for comment in Comment.objects.all():
-            if comment.content_object is None:
-                if verbose:
-                    self.stdout.write(
-                        "Comment `%s' to non-existing `%s' with PK `%s'" %
-                        (comment, comment.content_type.model, comment.object_pk))
-
-                while answer not in 'yn':
-                    answer = input("Do you wish to delete? [yN] ")
-                    if not answer:
-                        answer = 'x'
-                        continue
-                    answer = answer[0].lower()
-
-                if answer == 'y' :
-                    comment.delete()
-
-                    if verbose:
-                        self.stdout.write("Deleted comment `%s'" % comment)
+        if self.verbosity < 1:
+            self.answer = 'y'
+
+    def handle(self, *args, **kwargs):
+        self.configure(kwargs)
+        workers = kwargs['workers']
+        if self.batch_size < 1:
+            raise CommandError("--batch-size must be a positive integer.")
+        if workers < 1:
+            raise CommandError("--workers must be a positive integer.")
+        if workers > 1 and self.answer != 'y' and not self.dry_run:
+            raise CommandError("--workers can't ask for confirmation, use it with --yes or --dry-run.")
+        if workers > 1 and connection.vendor == 'sqlite' and not self.dry_run:
+            # SQLite allows a single writer at a time.
+            if self.verbosity >= 1:
+                self.stderr.write("SQLite doesn't support concurrent deletes, ignoring --workers.")
+            workers = 1
+
+        comments = Comment.objects.all()
+        if kwargs['content_types']:
+            comments = comments.filter(content_type__in=self.get_content_types(kwargs['content_types']))
+
+        content_types = list(ContentType.objects.filter(
+            pk__in=comments.order_by().values('content_type').distinct()
+        ))
+        if workers > 1 and len(content_types) > 1:
+            total = self.handle_parallel(content_types, workers)
+        else:
+            total = 0
+            for ctype in content_types:
+                total += self.handle_content_type(ctype, comments.filter(content_type=ctype))
+
+        if self.verbosity >= 1:
+            if self.dry_run:
+                self.stdout.write("Found %d stale comments" % total)
+            else:
+                self.stdout.write("Deleted %d stale comments" % total)
+
+    def handle_parallel(self, content_types, workers):
+        """
+        Check each content type in one of ``workers`` processes and write their
+        output in order. Returns the total number of stale comments.
+        """
+        options = {
+            'verbosity': self.verbosity, 'answer': self.answer,
+            'batch_size': self.batch_size, 'dry_run': self.dry_run,
+        }
+        # Workers must open their own database connections, and set up Django
+        # themselves when they aren't forked (the spawn and forkserver start
+        # methods).
+        connections.close_all()
+        total = 0
+        with ProcessPoolExecutor(max_workers=min(workers, len(content_types)),
+                                 initializer=django.setup) as executor:
+            results = executor.map(check_content_type, [ctype.pk for ctype in content_types],
+                                   [options] * len(content_types))
+            for n_stale, output in results:
+                self.stdout.write(output, ending='')
+                total += n_stale
+        return total
+
+    def get_content_types(self, labels):
+        content_types = []
+        for label in labels:
+            try:
+                app_label, model = label.split('.')
+                content_types.append(ContentType.objects.get_by_natural_key(app_label, model))
+            except ValueError:
+                raise CommandError("Content types must be in the format 'app_label.model', got %r." % label)
+            except ContentType.DoesNotExist:
+                raise CommandError("Unknown content type %r." % label)
+        return content_types
+
+    def handle_content_type(self, ctype, comments):
+        """
+        Find the comments on objects of ``ctype`` that don't exist anymore,
+        checking ``batch_size`` objects at a time, and delete them. Returns the
+        number of stale comments.
+        """
+        if self.verbosity >= 1:
+            self.stdout.write("Checking comments on `%s.%s'" % (ctype.app_label, ctype.model))
+        model = ctype.model_class()
+        object_pks = comments.order_by('object_pk').values_list('object_pk', flat=True).distinct()
+        n_objects = n_stale = 0
+        last_pk = None
+        while True:
+            batch = object_pks if last_pk is None else object_pks.filter(object_pk__gt=last_pk)
+            batch = list(batch[:self.batch_size])
+            if not batch:
+                break
+            last_pk = batch[-1]
+            n_objects += len(batch)
+
+            stale_pks = self.get_stale_pks(model, batch)
+            if stale_pks:
+                n_stale += self.delete_comments(ctype, comments.filter(object_pk__in=stale_pks))
+            if self.verbosity >= 2:
+                self.stdout.write("  %d objects checked, %d stale comments" % (n_objects, n_stale))
+        return n_stale
+
+    def get_stale_pks(self, model, object_pks):
+        """
+        Return those of ``object_pks`` which don't match an instance of
+        ``model``.
+        """
+        if model is None:
+            # The model of the content type was removed.
+            return object_pks
+        pk_field = model._meta.pk
+        values = {}
+        for object_pk in object_pks:
+            try:
+                values[object_pk] = pk_field.to_python(object_pk)
+            except ValidationError:
+                values[object_pk] = None
+        existing = set(model._base_manager.filter(
+            pk__in=[value for value in values.values() if value is not None]
+        ).values_list('pk', flat=True))
+        return [object_pk for object_pk, value in values.items() if value not in existing]
+
+    def delete_comments(self, ctype, comments):
+        comments = list(comments.select_related('user'))
+        if self.verbosity >= 1:
+            for comment in comments:
+                self.stdout.write(
+                    "Comment `%s' to non-existing `%s' with PK `%s'" %
+                    (comment, ctype.model, comment.object_pk))
+        if self.dry_run:
+            return len(comments)
+
+        while self.answer not in 'yn':
+            self.answer = input("Do you wish to delete? [yN] ")
+            if not self.answer:
+                self.answer = 'x'
+                continue
+            self.answer = self.answer[0].lower()
+
+        if self.answer != 'y':
+            return 0
+        for start in range(0, len(comments), self.batch_size):
+            with transaction.atomic():
+                Comment.objects.filter(
+                    pk__in=[comment.pk for comment in comments[start:start + self.batch_size]]
+                ).delete()
+        if self.verbosity >= 1:
+            for comment in comments:
+                self.stdout.write("Deleted comment `%s'" % comment)
+        return len(comments)
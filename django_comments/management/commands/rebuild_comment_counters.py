@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+import django_comments
+from django_comments.models import CommentCounter
+
+
+class Command(BaseCommand):
+    help = ("Recompute the denormalized comment counters from the comments "
+            "table.")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', default=1000, type=int, dest='batch_size',
+            help='Number of counters to insert per query (default: 1000)',
+        )
+
+    def handle(self, *args, **kwargs):
+        verbose = kwargs['verbosity'] >= 1
+        batch_size = kwargs['batch_size']
+
+        rows = django_comments.get_model().objects.filter(
+            is_public=True,
+            is_removed=False,
+        ).order_by().values_list('content_type', 'object_pk', 'site').annotate(count=Count('pk'))
+
+        with transaction.atomic():
+            CommentCounter.objects.all().delete()
+            counters = CommentCounter.objects.bulk_create(
+                (
+                    CommentCounter(content_type_id=content_type_id, object_pk=object_pk,
+                                   site_id=site_id, count=count)
+                    for content_type_id, object_pk, site_id, count in rows.iterator()
+                ),
+                batch_size=batch_size,
+            )
+
+        if verbose:
+            self.stdout.write("Rebuilt %d comment counters" % len(counters))
@@ -0,0 +1,49 @@
+from django.contrib.sites.models import Site
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils.translation import gettext as _
+
+from django_comments.models import CommentNotification
+from django_comments.notifications import build_messages, send_messages
+
+
+class Command(BaseCommand):
+    help = "Send the queued comment moderation notifications."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', default=100, type=int, dest='batch_size',
+            help='Number of notifications sent per connection (default: 100)',
+        )
+        parser.add_argument(
+            '--digest', action='store_true', dest='digest',
+            help='Send the notifications with the same recipients as one email',
+        )
+
+    def handle(self, *args, **kwargs):
+        verbosity = kwargs['verbosity']
+        batch_size = kwargs['batch_size']
+        if batch_size < 1:
+            raise CommandError("--batch-size must be a positive integer.")
+
+        digest_subject = None
+        if kwargs['digest']:
+            digest_subject = _('[%(site)s] %%(count)d new comments posted') % {
+                'site': Site.objects.get_current().name,
+            }
+
+        n_notifications = n_messages = 0
+        while True:
+            with transaction.atomic():
+                # Skip the notifications locked by a concurrent run.
+                notifications = list(
+                    CommentNotification.objects.select_for_update(skip_locked=True).order_by('pk')[:batch_size]
+                )
+                if not notifications:
+                    break
+                n_messages += send_messages(build_messages(notifications, digest_subject))
+                CommentNotification.objects.filter(pk__in=[n.pk for n in notifications]).delete()
+            n_notifications += len(notifications)
+
+        if verbosity >= 1:
+            self.stdout.write("Sent %d notifications in %d emails" % (n_notifications, n_messages))
@@ -1,9 +1,138 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
 from django.db import models
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce, Concat, Greatest, NullIf, Trim
 from django.contrib.contenttypes.models import ContentType
+from django.urls import reverse
 from django.utils.encoding import force_str
 
 
+def counters_enabled():
+    """
+    Return whether the denormalized ``CommentCounter`` table is maintained
+    and used for counting comments.
+    """
+    return getattr(settings, 'COMMENTS_USE_COUNTERS', False)
+
+
+def group_by_content_type(objects):
+    """
+    Return the saved ones of ``objects``, in order, and a dict mapping each of
+    their content types to a dict of them keyed by primary key, as stored in
+    ``object_pk``. Unsaved objects can't have comments.
+    """
+    saved_objects = []
+    objects_by_ctype = {}
+    for obj in objects:
+        if obj.pk is None:
+            continue
+        saved_objects.append(obj)
+        ctype = ContentType.objects.get_for_model(obj)
+        objects_by_ctype.setdefault(ctype, {})[force_str(obj.pk)] = obj
+    return saved_objects, objects_by_ctype
+
+
+def group_by_object(queryset, objects):
+    """
+    Return a dict mapping each of ``objects`` (in order) to the list of its
+    comments in ``queryset``, fetched with one query per content type.
+    """
+    objects, objects_by_ctype = group_by_content_type(objects)
+    comments = {obj: [] for obj in objects}
+
+    content_object = queryset.model._meta.get_field('content_object')
+    for ctype, objects_by_pk in objects_by_ctype.items():
+        for comment in queryset.filter(content_type=ctype, object_pk__in=objects_by_pk):
+            obj = objects_by_pk[comment.object_pk]
+            # Spare a query when accessing comment.content_object.
+            content_object.set_cached_value(comment, obj)
+            comments[obj].append(comment)
+    return comments
+
+
+class CommentRow:
+    """
+    A read-only comment, as returned by ``CommentManager.rows()``: just the
+    fields needed to display it, with the ``name`` and ``email`` of its poster
+    resolved by the database.
+    """
+
+    __slots__ = (
+        'pk', 'content_type_id', 'object_pk', 'site_id', 'user_id', 'name', 'email', 'url',
+        'comment', 'submit_date', 'is_public', 'is_removed',
+    )
+
+    def __init__(self, pk, content_type_id, object_pk, site_id, user_id, name, email, url,
+                 comment, submit_date, is_public, is_removed):
+        self.pk = pk
+        self.content_type_id = content_type_id
+        self.object_pk = object_pk
+        self.site_id = site_id
+        self.user_id = user_id
+        self.name = name
+        self.email = email
+        self.url = url
+        self.comment = comment
+        self.submit_date = submit_date
+        self.is_public = is_public
+        self.is_removed = is_removed
+
+    def __repr__(self):
+        return '<%s: %s>' % (self.__class__.__name__, self.pk)
+
+    def __eq__(self, other):
+        if not isinstance(other, CommentRow):
+            return NotImplemented
+        return self.pk == other.pk
+
+    def __hash__(self):
+        return hash(self.pk)
+
+    @property
+    def id(self):
+        return self.pk
+
+    @property
+    def userinfo(self):
+        return {'name': self.name, 'email': self.email, 'url': self.url}
+
+    def get_absolute_url(self, anchor_pattern="#c%(id)s"):
+        url = reverse("comments-url-redirect", args=(self.content_type_id, self.object_pk))
+        values = {name: getattr(self, name) for name in self.__slots__}
+        values['id'] = self.pk
+        return url + (anchor_pattern % values)
+
+
+def get_userinfo_expressions():
+    """
+    Return the expressions computing the ``name`` and ``email`` of a comment's
+    poster like ``CommentAbstractModel.userinfo``, assuming the user model's
+    ``get_full_name()`` joins its ``first_name`` and ``last_name`` fields.
+    """
+    User = get_user_model()
+    user_fields = {f.name for f in User._meta.get_fields()}
+    names = [NullIf('user_name', Value('')), 'user__%s' % User.USERNAME_FIELD, Value('')]
+    if {'first_name', 'last_name'} <= user_fields:
+        full_name = Trim(Concat('user__first_name', Value(' '), 'user__last_name'))
+        names.insert(0, NullIf(full_name, Value('')))
+    name = Coalesce(*names, output_field=models.CharField())
+    email = Coalesce(
+        NullIf('user__%s' % User.get_email_field_name(), Value('')), 'user_email',
+        output_field=models.CharField(),
+    )
+    return name, email
+
+
 class CommentManager(models.Manager):
+    def with_related(self):
+        """
+        QuerySet for all comments, fetching their user and site along so that
+        ``userinfo``, ``get_as_text()`` and friends don't need a query per
+        comment.
+        """
+        return self.get_queryset().select_related('user', 'site')
+
     def in_moderation(self):
         """
         QuerySet for all comments currently in the moderation queue.
@@ -20,3 +149,94 @@ class CommentManager(models.Manager):
         if isinstance(model, models.Model):
             qs = qs.filter(object_pk=force_str(model._get_pk_val()))
         return qs
+
+    def with_text(self, text):
+        """
+        QuerySet for all comments with the same text as ``text``, ignoring case
+        and whitespace, using the indexed ``comment_hash``.
+        """
+        from .abstracts import get_comment_hash
+        return self.get_queryset().filter(comment_hash=get_comment_hash(text))
+
+    def visible(self, site_id=None):
+        """
+        QuerySet for the comments shown by the template tags on a site (the
+        current ``SITE_ID`` by default): public ones and, unless
+        ``COMMENTS_HIDE_REMOVED`` is ``False``, non-removed ones.
+        """
+        if site_id is None:
+            site_id = settings.SITE_ID
+        qs = self.get_queryset().filter(site__pk=site_id, is_public=True)
+        if getattr(settings, 'COMMENTS_HIDE_REMOVED', True):
+            qs = qs.filter(is_removed=False)
+        return qs.select_related('user')
+
+    def for_objects(self, objects, site_id=None):
+        """
+        Return a dict mapping each of ``objects`` to the list of its visible
+        comments on a site, with one query per content type.
+        """
+        return group_by_object(self.visible(site_id), objects)
+
+    def rows(self, queryset=None):
+        """
+        Return the comments of ``queryset`` (all comments by default) as a
+        list of ``CommentRow``, which are much lighter than model instances,
+        for read-only display.
+        """
+        if queryset is None:
+            queryset = self.get_queryset()
+        name, email = get_userinfo_expressions()
+        rows = queryset.annotate(row_name=name, row_email=email).values_list(
+            'pk', 'content_type_id', 'object_pk', 'site_id', 'user_id', 'row_name', 'row_email', 'user_url',
+            'comment', 'submit_date', 'is_public', 'is_removed',
+        )
+        return [CommentRow(*row) for row in rows]
+
+    def count_for_object(self, obj, site_id=None):
+        """
+        Number of public, non-removed comments on ``obj`` for a site (the
+        current ``SITE_ID`` by default). Reads the ``CommentCounter`` table
+        when ``COMMENTS_USE_COUNTERS`` is enabled.
+        """
+        if site_id is None:
+            site_id = settings.SITE_ID
+        if counters_enabled():
+            from .models import CommentCounter
+            return CommentCounter.objects.get_count(
+                ContentType.objects.get_for_model(obj), obj._get_pk_val(), site_id,
+            )
+        return self.for_model(obj).filter(site__pk=site_id, is_public=True, is_removed=False).count()
+
+
+class CommentCounterManager(models.Manager):
+    def get_count(self, content_type, object_pk, site_id):
+        """
+        Return the stored comment count for an object, or 0 if no counter
+        exists for it.
+        """
+        counts = self.filter(
+            content_type=content_type,
+            object_pk=force_str(object_pk),
+            site__pk=site_id,
+        ).values_list('count', flat=True)
+        for count in counts:
+            return count
+        return 0
+
+    def adjust(self, content_type_id, object_pk, site_id, delta):
+        """
+        Atomically add ``delta`` (which may be negative) to the counter of an
+        object, creating the counter if needed.
+        """
+        lookup = {
+            'content_type_id': content_type_id,
+            'object_pk': force_str(object_pk),
+            'site_id': site_id,
+        }
+        if self.filter(**lookup).update(count=Greatest(F('count') + delta, Value(0))):
+            return
+        if delta > 0:
+            counter, created = self.get_or_create(defaults={'count': delta}, **lookup)
+            if not created:
+                self.filter(pk=counter.pk).update(count=F('count') + delta)
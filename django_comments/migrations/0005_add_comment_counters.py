@@ -0,0 +1,30 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sites', '0001_initial'),
+        ('contenttypes', '0001_initial'),
+        ('django_comments', '0004_add_object_pk_is_removed_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CommentCounter',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('object_pk', models.CharField(max_length=64, verbose_name='object ID')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='count')),
+                ('content_type', models.ForeignKey(verbose_name='content type', to='contenttypes.ContentType',
+                    on_delete=models.CASCADE)),
+                ('site', models.ForeignKey(to='sites.Site', on_delete=models.CASCADE)),
+            ],
+            options={
+                'db_table': 'django_comment_counters',
+                'verbose_name': 'comment counter',
+                'verbose_name_plural': 'comment counters',
+                'unique_together': {('content_type', 'object_pk', 'site')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_comments', '0005_add_comment_counters'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(
+                fields=['content_type', 'object_pk', 'site', 'is_public', 'is_removed', 'submit_date'],
+                name='django_comm_object_list_idx',
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_comments', '0006_add_object_list_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='comment_hash',
+            field=models.CharField(
+                blank=True, db_index=True, editable=False, max_length=16, verbose_name='comment hash',
+            ),
+        ),
+    ]
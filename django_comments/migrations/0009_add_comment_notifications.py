@@ -0,0 +1,28 @@
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_comments', '0008_add_comment_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CommentNotification',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('subject', models.TextField(verbose_name='subject')),
+                ('message', models.TextField(verbose_name='message')),
+                ('from_email', models.CharField(max_length=254, verbose_name='from email')),
+                ('recipients', models.TextField(help_text='One email address per line.', verbose_name='recipients')),
+                ('created', models.DateTimeField(default=django.utils.timezone.now, verbose_name='created')),
+            ],
+            options={
+                'db_table': 'django_comment_notifications',
+                'verbose_name': 'comment notification',
+                'verbose_name_plural': 'comment notifications',
+            },
+        ),
+    ]
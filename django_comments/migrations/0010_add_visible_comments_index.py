@@ -0,0 +1,32 @@
+from django.db import migrations, models
+
+# Not part of the model's state, so that databases without partial indexes
+# (e.g. MySQL) don't get the models.W037 warning. As SQLite drops indexes
+# missing from the state when a migration rebuilds the table, this must stay
+# after any migration altering the comments table.
+VISIBLE_COMMENTS_INDEX = models.Index(
+    fields=['content_type', 'object_pk', 'site', 'submit_date'],
+    name='django_comm_visible_idx',
+    condition=models.Q(is_public=True, is_removed=False),
+)
+
+
+def add_visible_comments_index(apps, schema_editor):
+    if schema_editor.connection.features.supports_partial_indexes:
+        schema_editor.add_index(apps.get_model('django_comments', 'Comment'), VISIBLE_COMMENTS_INDEX)
+
+
+def remove_visible_comments_index(apps, schema_editor):
+    if schema_editor.connection.features.supports_partial_indexes:
+        schema_editor.remove_index(apps.get_model('django_comments', 'Comment'), VISIBLE_COMMENTS_INDEX)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_comments', '0009_add_comment_notifications'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_visible_comments_index, remove_visible_comments_index),
+    ]
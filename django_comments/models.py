@@ -1,14 +1,28 @@
 from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.sites.models import Site
 from django.db import models
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 from .abstracts import CommentAbstractModel
+from .managers import CommentCounterManager
 
 
 class Comment(CommentAbstractModel):
     class Meta(CommentAbstractModel.Meta):
         db_table = "django_comments"
+        indexes = [
+            # Matches the filters and ordering of the comment list template
+            # tags, so that a (keyset paginated) list is one index range scan.
+            # Some databases (e.g. SQLite) can't use its boolean columns;
+            # migration 0010 adds a partial index on the visible comments for
+            # those supporting partial indexes.
+            models.Index(
+                fields=['content_type', 'object_pk', 'site', 'is_public', 'is_removed', 'submit_date'],
+                name='django_comm_object_list_idx',
+            ),
+        ]
 
 
 class CommentFlag(models.Model):
@@ -56,3 +70,59 @@ class CommentFlag(models.Model):
         if self.flag_date is None:
             self.flag_date = timezone.now()
         super().save(*args, **kwargs)
+
+
+class CommentCounter(models.Model):
+    """
+    A denormalized count of the visible (public and non-removed) comments
+    attached to an object on a site.
+
+    Counters are only maintained when ``COMMENTS_USE_COUNTERS`` is ``True``.
+    They are adjusted when comments are created, approved, removed or deleted
+    through the comments framework; the ``rebuild_comment_counters``
+    management command repairs any drift.
+    """
+    content_type = models.ForeignKey(
+        ContentType, verbose_name=_('content type'), on_delete=models.CASCADE,
+    )
+    object_pk = models.CharField(_('object ID'), max_length=64)
+    site = models.ForeignKey(Site, on_delete=models.CASCADE)
+    count = models.PositiveIntegerField(_('count'), default=0)
+
+    objects = CommentCounterManager()
+
+    class Meta:
+        db_table = 'django_comment_counters'
+        unique_together = [('content_type', 'object_pk', 'site')]
+        verbose_name = _('comment counter')
+        verbose_name_plural = _('comment counters')
+
+    def __str__(self):
+        return "%s comments on %s %s" % (self.count, self.content_type, self.object_pk)
+
+
+class CommentNotification(models.Model):
+    """
+    A moderation email notification waiting to be sent by the
+    ``send_comment_notifications`` management command.
+
+    Notifications are only queued when ``COMMENTS_NOTIFICATION_BACKEND`` is
+    ``'django_comments.notifications.QueueBackend'``.
+    """
+    subject = models.TextField(_('subject'))
+    message = models.TextField(_('message'))
+    from_email = models.CharField(_('from email'), max_length=254)
+    recipients = models.TextField(_('recipients'), help_text=_('One email address per line.'))
+    created = models.DateTimeField(_('created'), default=timezone.now)
+
+    class Meta:
+        db_table = 'django_comment_notifications'
+        verbose_name = _('comment notification')
+        verbose_name_plural = _('comment notifications')
+
+    def __str__(self):
+        return self.subject
+
+    @property
+    def recipient_list(self):
+        return self.recipients.split('\n') if self.recipients else []
@@ -55,10 +55,13 @@ class.
 """
 
 import datetime
+import logging
+import re
+import time
 
 from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
 from django.contrib.sites.shortcuts import get_current_site
-from django.core.mail import send_mail
 from django.db.models.base import ModelBase
 from django.template import loader
 from django.utils import timezone
@@ -66,6 +69,10 @@ from django.utils.translation import gettext as _
 
 import django_comments
 from django_comments import signals
+from django_comments.notifications import get_notification_backend
+from django_comments.profanities import ProfanityMatcher
+
+logger = logging.getLogger('django_comments.moderation')
 
 
 class AlreadyModerated(Exception):
@@ -86,6 +93,157 @@ class NotModerated(Exception):
     pass
 
 
+def _get_delta(now, then):
+    if now.__class__ is not then.__class__:
+        now = datetime.date(now.year, now.month, now.day)
+        then = datetime.date(then.year, then.month, then.day)
+    if now < then:
+        raise ValueError("Cannot determine moderation rules because date field is set to a value in the future")
+    return now - then
+
+
+class ModerationRule:
+    """
+    A check applied to new comments by ``CommentModerator.rules``.
+
+    A rule whose ``action`` is ``REJECT`` disallows (immediately deletes) the
+    comments it matches, one whose ``action`` is ``MODERATE`` marks them
+    non-public. Rules are run in increasing order of ``cost``, a rough
+    relative cost of ``matches()``, and the first matching rule wins, so
+    cheap rules can spare running expensive ones.
+
+    Subclasses must implement ``matches()``. ``action`` and ``cost`` default
+    to the class attributes and can be passed to the constructor.
+
+    """
+    REJECT = 'reject'
+    MODERATE = 'moderate'
+
+    action = MODERATE
+    cost = 1
+
+    def __init__(self, action=None, cost=None):
+        if action is not None:
+            self.action = action
+        if cost is not None:
+            self.cost = cost
+        if self.action not in (self.REJECT, self.MODERATE):
+            raise ValueError("Unknown moderation action %r" % self.action)
+
+    def __str__(self):
+        return self.__class__.__name__
+
+    def matches(self, comment, content_object, request):
+        """
+        Return ``True`` if the rule's action should be applied to
+        ``comment``.
+
+        """
+        raise NotImplementedError('subclasses of ModerationRule must provide a matches() method')
+
+
+class LinkCountRule(ModerationRule):
+    """
+    Match comments containing more than ``max_links`` links.
+
+    """
+    link_re = re.compile(r'https?://|www\.', re.IGNORECASE)
+
+    def __init__(self, max_links, **kwargs):
+        super().__init__(**kwargs)
+        self.max_links = max_links
+
+    def matches(self, comment, content_object, request):
+        return len(self.link_re.findall(comment.comment)) > self.max_links
+
+
+class AccountAgeRule(ModerationRule):
+    """
+    Match comments posted by users who joined less than ``min_age`` (a
+    ``datetime.timedelta``) ago and, if ``anonymous`` is ``True``, comments
+    posted by unauthenticated users.
+
+    """
+
+    def __init__(self, min_age, anonymous=True, **kwargs):
+        super().__init__(**kwargs)
+        self.min_age = min_age
+        self.anonymous = anonymous
+
+    def matches(self, comment, content_object, request):
+        if not comment.user_id:
+            return self.anonymous
+        date_joined = getattr(comment.user, 'date_joined', None)
+        return date_joined is not None and timezone.now() - date_joined < self.min_age
+
+
+class CloseAfterRule(ModerationRule):
+    """
+    Match comments on objects whose ``field``, a ``DateField`` or
+    ``DateTimeField``, is at least ``days`` days old. Like
+    ``CommentModerator.auto_close_field``, rejects them by default.
+
+    """
+    action = ModerationRule.REJECT
+
+    def __init__(self, field, days, **kwargs):
+        super().__init__(**kwargs)
+        self.field = field
+        self.days = days
+
+    def matches(self, comment, content_object, request):
+        date = getattr(content_object, self.field)
+        return date is not None and _get_delta(timezone.now(), date).days >= self.days
+
+
+class BlocklistRule(ModerationRule):
+    """
+    Match comments whose text, name or URL contains one of ``words``, or only
+    whole words if ``whole_words`` is ``True``, ignoring case. Rejects them by
+    default.
+
+    """
+    action = ModerationRule.REJECT
+    cost = 2
+
+    def __init__(self, words, whole_words=False, **kwargs):
+        super().__init__(**kwargs)
+        self.matcher = ProfanityMatcher(words, whole_words)
+
+    def matches(self, comment, content_object, request):
+        text = '\n'.join((comment.comment, comment.user_name, comment.user_url))
+        return bool(self.matcher.find(text))
+
+
+class RateLimitRule(ModerationRule):
+    """
+    Match comments of users, or IP addresses for unauthenticated users, who
+    already posted ``max_comments`` comments in the last ``period`` (a
+    ``datetime.timedelta``). Rejects them by default. Runs a query, so it's
+    more expensive than the other rules.
+
+    """
+    action = ModerationRule.REJECT
+    cost = 10
+
+    def __init__(self, max_comments, period, **kwargs):
+        super().__init__(**kwargs)
+        self.max_comments = max_comments
+        self.period = period
+
+    def matches(self, comment, content_object, request):
+        comments = comment.__class__._default_manager.filter(submit_date__gte=timezone.now() - self.period)
+        if comment.user_id:
+            comments = comments.filter(user_id=comment.user_id)
+        elif comment.ip_address:
+            comments = comments.filter(ip_address=comment.ip_address)
+        else:
+            return False
+        if comment.pk is not None:
+            comments = comments.exclude(pk=comment.pk)
+        return comments[:self.max_comments].count() >= self.max_comments
+
+
 class CommentModerator:
     """
     Encapsulates comment-moderation options for a given model.
@@ -140,6 +298,12 @@ class CommentModerator:
         object should be marked non-public. Default value is
         ``None``.
 
+    ``rules``
+        A list of ``ModerationRule`` instances, applied after the
+        options above. The rejecting rules are run by ``allow`` and
+        the moderating ones by ``moderate``, cheapest first, until one
+        of them matches. Default value is an empty list.
+
     Most common moderation needs can be covered by changing these
     attributes, but further customization can be obtained by
     subclassing and overriding the following methods. Each method will
@@ -175,9 +339,14 @@ class CommentModerator:
     email_notification = False
     enable_field = None
     moderate_after = None
+    rules = []
 
     def __init__(self, model):
         self._model = model
+        self._rules = {
+            action: sorted((rule for rule in self.rules if rule.action == action), key=lambda rule: rule.cost)
+            for action in (ModerationRule.REJECT, ModerationRule.MODERATE)
+        }
 
     def _get_delta(self, now, then):
         """
@@ -192,12 +361,7 @@ class CommentModerator:
         ``datetime.date`` before calculating the delta.
 
         """
-        if now.__class__ is not then.__class__:
-            now = datetime.date(now.year, now.month, now.day)
-            then = datetime.date(then.year, then.month, then.day)
-        if now < then:
-            raise ValueError("Cannot determine moderation rules because date field is set to a value in the future")
-        return now - then
+        return _get_delta(now, then)
 
     def allow(self, comment, content_object, request):
         """
@@ -216,6 +380,8 @@ class CommentModerator:
             if close_after_date is not None and self._get_delta(timezone.now(),
                                                                 close_after_date).days >= self.close_after:
                 return False
+        if self.get_matching_rule(ModerationRule.REJECT, comment, content_object, request) is not None:
+            return False
         return True
 
     def moderate(self, comment, content_object, request):
@@ -233,12 +399,36 @@ class CommentModerator:
             if moderate_after_date is not None and self._get_delta(timezone.now(),
                                                                    moderate_after_date).days >= self.moderate_after:
                 return True
+        if self.get_matching_rule(ModerationRule.MODERATE, comment, content_object, request) is not None:
+            return True
         return False
 
+    def get_matching_rule(self, action, comment, content_object, request):
+        """
+        Return the first of the ``rules`` with the given action matching
+        the comment, trying the cheapest ones first, or ``None``.
+
+        The time taken by each rule is logged at the ``DEBUG`` level on
+        the ``django_comments.moderation`` logger.
+
+        """
+        for rule in self._rules[action]:
+            start = time.perf_counter()
+            matched = rule.matches(comment, content_object, request)
+            duration = time.perf_counter() - start
+            logger.debug(
+                "(%.3f ms) %s %s", duration * 1000, rule, "matched" if matched else "passed",
+                extra={'rule': rule, 'duration': duration, 'matched': matched},
+            )
+            if matched:
+                return rule
+        return None
+
     def email(self, comment, content_object, request):
         """
         Send email notification of a new comment to site staff when email
-        notifications have been requested.
+        notifications have been requested, through the backend set by
+        ``COMMENTS_NOTIFICATION_BACKEND``.
 
         """
         if not self.email_notification:
@@ -254,7 +444,7 @@ class CommentModerator:
             'object': content_object,
         }
         message = t.render(c)
-        send_mail(subject, message, settings.DEFAULT_FROM_EMAIL, recipient_list, fail_silently=True)
+        get_notification_backend().send(subject, message, settings.DEFAULT_FROM_EMAIL, recipient_list)
 
 
 class Moderator:
@@ -334,17 +524,28 @@ class Moderator:
                 raise NotModerated("The model '%s' is not currently being moderated" % model._meta.model_name)
             del self._registry[model]
 
+    def get_moderation_class(self, comment):
+        """
+        Return the moderation class registered for the model of the
+        object ``comment`` is attached to, or ``None``.
+
+        The model is found from ``comment.content_type_id`` through the
+        cache of ``ContentType.objects``, without fetching the content type.
+
+        """
+        model = ContentType.objects.get_for_id(comment.content_type_id).model_class()
+        return self._registry.get(model)
+
     def pre_save_moderation(self, sender, comment, request, **kwargs):
         """
         Apply any necessary pre-save moderation steps to new
         comments.
 
         """
-        model = comment.content_type.model_class()
-        if model not in self._registry:
+        moderation_class = self.get_moderation_class(comment)
+        if moderation_class is None:
             return
         content_object = comment.content_object
-        moderation_class = self._registry[model]
 
         # Comment will be disallowed outright (HTTP 403 response)
         if not moderation_class.allow(comment, content_object, request):
@@ -359,10 +560,10 @@ class Moderator:
         comments.
 
         """
-        model = comment.content_type.model_class()
-        if model not in self._registry:
+        moderation_class = self.get_moderation_class(comment)
+        if moderation_class is None:
             return
-        self._registry[model].email(comment, comment.content_object, request)
+        moderation_class.email(comment, comment.content_object, request)
 
 
 # Import this instance in your own code to use in registering
@@ -0,0 +1,91 @@
+"""
+Delivery of the moderation email notifications.
+
+``CommentModerator.email()`` hands its notifications to the backend named by
+the ``COMMENTS_NOTIFICATION_BACKEND`` setting. ``EmailBackend``, the default,
+sends them right away, while the comment is being posted. ``QueueBackend``
+stores them in the ``CommentNotification`` table instead, and the
+``send_comment_notifications`` management command sends them later, over one
+SMTP connection and optionally as digests.
+"""
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection, send_mail
+from django.utils.module_loading import import_string
+
+DEFAULT_NOTIFICATION_BACKEND = 'django_comments.notifications.EmailBackend'
+
+
+def get_notification_backend():
+    """
+    Return an instance of the notification backend named by the
+    ``COMMENTS_NOTIFICATION_BACKEND`` setting.
+    """
+    return import_string(getattr(settings, 'COMMENTS_NOTIFICATION_BACKEND', DEFAULT_NOTIFICATION_BACKEND))()
+
+
+class BaseNotificationBackend:
+    """
+    Base class for notification backends, which must implement ``send()``.
+    """
+
+    def send(self, subject, message, from_email, recipient_list):
+        raise NotImplementedError('subclasses of BaseNotificationBackend must provide a send() method')
+
+
+class EmailBackend(BaseNotificationBackend):
+    """
+    Send notifications immediately.
+    """
+
+    def send(self, subject, message, from_email, recipient_list):
+        send_mail(subject, message, from_email, recipient_list, fail_silently=True)
+
+
+class QueueBackend(BaseNotificationBackend):
+    """
+    Queue notifications to be sent by ``send_comment_notifications``.
+    """
+
+    def send(self, subject, message, from_email, recipient_list):
+        from .models import CommentNotification
+        CommentNotification.objects.create(
+            subject=subject,
+            message=message,
+            from_email=from_email,
+            recipients='\n'.join(recipient_list),
+        )
+
+
+def build_messages(notifications, digest_subject=None):
+    """
+    Return the ``EmailMessage`` objects for a list of queued notifications:
+    one per notification or, if ``digest_subject`` is given, one per sender
+    and recipients, holding all of their notifications. ``digest_subject`` is
+    formatted with the number of notifications as ``count``.
+    """
+    if digest_subject is None:
+        return [
+            EmailMessage(n.subject, n.message, n.from_email, n.recipient_list)
+            for n in notifications
+        ]
+    groups = {}
+    for n in notifications:
+        groups.setdefault((n.from_email, n.recipients), []).append(n)
+    messages = []
+    for (from_email, recipients), group in groups.items():
+        if len(group) == 1:
+            subject = group[0].subject
+        else:
+            subject = digest_subject % {'count': len(group)}
+        body = ('\n\n%s\n\n' % ('-' * 70)).join('%s\n\n%s' % (n.subject, n.message) for n in group)
+        messages.append(EmailMessage(subject, body, from_email, group[0].recipient_list))
+    return messages
+
+
+def send_messages(messages, fail_silently=False):
+    """
+    Send ``messages`` over a single connection of the email backend and return
+    the number of messages sent.
+    """
+    connection = get_connection(fail_silently=fail_silently)
+    return connection.send_messages(messages) or 0
@@ -0,0 +1,84 @@
+"""
+Matching of the words in the ``PROFANITIES_LIST`` setting.
+
+The words are compiled into a single regular expression, so a comment is
+scanned once instead of once per word. The expression is shaped like a trie
+(``ro(?:ast|ost(?:er)?)`` for "roast", "roost" and "rooster"): a plain
+alternation of thousands of words is tried word by word at every position of
+the comment, which is slower than the former substring tests. Matchers are
+cached per word list and rebuilt when the setting changes.
+"""
+import functools
+import re
+
+from django.conf import settings
+
+
+def _trie_pattern(trie):
+    """
+    Return a regular expression matching the words of ``trie``, a dict of
+    dicts keyed by the next character and by ``None`` where a word ends.
+    """
+    alternatives = [re.escape(char) + _trie_pattern(child)
+                    for char, child in sorted(item for item in trie.items() if item[0] is not None)]
+    if not alternatives:
+        return ''
+    pattern = alternatives[0] if len(alternatives) == 1 else '(?:%s)' % '|'.join(alternatives)
+    if None in trie:
+        pattern = '(?:%s)?' % pattern
+    return pattern
+
+
+class ProfanityMatcher:
+    """
+    Find the words of ``words`` in a text, ignoring case. If ``whole_words``
+    is ``True``, a word only matches between word boundaries ("ass" doesn't
+    match "class").
+    """
+
+    def __init__(self, words, whole_words=False):
+        self.words = [w for w in words if w]
+        self.whole_words = whole_words
+        trie = {}
+        for word in self.words:
+            node = trie
+            for char in word:
+                node = node.setdefault(char, {})
+            node[None] = {}
+        pattern = _trie_pattern(trie)
+        if whole_words:
+            pattern = r'\b%s\b' % pattern
+        self.regex = re.compile(pattern) if self.words else None
+
+    def find(self, text):
+        """
+        Return the words of the list found in ``text``, in the order of the
+        list.
+        """
+        if self.regex is None:
+            return []
+        text = text.lower()
+        if not self.whole_words:
+            if self.regex.search(text) is None:
+                return []
+            # Words overlapping the matched ones, e.g. "roost" in "rooster",
+            # are reported too.
+            return [w for w in self.words if w in text]
+        found = {match.group() for match in self.regex.finditer(text)}
+        return [w for w in self.words if w in found]
+
+
+@functools.lru_cache(maxsize=8)
+def _get_matcher(words, whole_words):
+    return ProfanityMatcher(words, whole_words)
+
+
+def get_profanity_matcher():
+    """
+    Return the matcher of the ``PROFANITIES_LIST`` setting, compiled the first
+    time it's used.
+    """
+    return _get_matcher(
+        tuple(getattr(settings, 'PROFANITIES_LIST', ())),
+        getattr(settings, 'COMMENTS_PROFANITIES_WHOLE_WORDS', False),
+    )
@@ -0,0 +1,85 @@
+"""
+Rate limiting of comment posting.
+
+The ``COMMENTS_RATE_LIMITS`` setting maps content type labels
+(``"app_label.model"``) or ``"default"`` to a ``(max_comments, seconds)``
+tuple, or ``None`` for no limit. Authenticated users are limited per user,
+other users per IP address.
+
+Limits are enforced over a sliding window approximated from two fixed
+windows kept in the cache: the hits of the previous window are weighted by
+the share of it still inside the sliding window. Hits are counted with
+atomic ``cache.incr()`` calls, so concurrent requests don't lose updates.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+CACHE_PREFIX = 'django_comments.ratelimit'
+
+
+def get_rate_limit(content_type):
+    """
+    Return the key and the ``(max_comments, seconds)`` limit applying to
+    comments on ``content_type``, a ``"app_label.model"`` label, or
+    ``(None, None)`` if they aren't limited.
+    """
+    limits = getattr(settings, 'COMMENTS_RATE_LIMITS', None)
+    if not limits:
+        return None, None
+    key = content_type.lower()
+    if key not in limits:
+        key = 'default'
+    return key, limits.get(key)
+
+
+def get_client_key(request):
+    """
+    Return the key identifying the poster of ``request``, or ``None``.
+    """
+    if request.user.is_authenticated:
+        return 'user:%s' % request.user.pk
+    ip_address = request.META.get('REMOTE_ADDR')
+    if ip_address:
+        return 'ip:%s' % ip_address
+    return None
+
+
+def hit(key, max_comments, seconds):
+    """
+    Count a comment posted under ``key`` and return ``True`` if more than
+    ``max_comments`` were posted in the last ``seconds``.
+    """
+    now = time.time()
+    window = int(now // seconds)
+    current_key = '%s:%s:%d' % (CACHE_PREFIX, key, window)
+    previous_key = '%s:%s:%d' % (CACHE_PREFIX, key, window - 1)
+    cache.add(current_key, 0, timeout=2 * seconds)
+    try:
+        current = cache.incr(current_key)
+    except ValueError:
+        # Expired between add() and incr().
+        cache.set(current_key, 1, timeout=2 * seconds)
+        current = 1
+    previous = cache.get(previous_key, 0)
+    weight = 1 - (now % seconds) / seconds
+    return previous * weight + current > max_comments
+
+
+def is_rate_limited(request, content_type):
+    """
+    Count a comment posted by ``request`` on ``content_type`` and return the
+    length of the limit's window in seconds if the poster exceeded it, or
+    ``None``.
+    """
+    key, limit = get_rate_limit(content_type)
+    if limit is None:
+        return None
+    client_key = get_client_key(request)
+    if client_key is None:
+        return None
+    max_comments, seconds = limit
+    if hit('%s:%s' % (key, client_key), max_comments, seconds):
+        return seconds
+    return None
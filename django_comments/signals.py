@@ -22,3 +22,9 @@ comment_was_posted = Signal()
 # comment, or some other custom user flag.
 # Arguments: "comment", "flag", "created", "request"
 comment_was_flagged = Signal()
+
+# Sent after many comments were flagged at once by one of the bulk moderation
+# functions (e.g. from an admin action). Unlike comment_was_flagged, this is
+# sent once per batch rather than for every comment.
+# Arguments: "comment_ids", "flag", "request"
+comments_were_flagged = Signal()
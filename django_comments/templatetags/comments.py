@@ -1,14 +1,37 @@
+import re
+
 from django import template
 from django.template.loader import render_to_string
 from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.sites.shortcuts import get_current_site
-from django.utils.encoding import smart_str
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Q
+from django.utils.dateparse import parse_datetime
+from django.utils.encoding import force_bytes, force_str, smart_str
+from django.utils.html import conditional_escape
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+from django.utils import timezone
+from django.utils.translation import get_language
 
 import django_comments
+from django_comments import caching, templating
+from django_comments.forms import CommentSecurityForm
+from django_comments.managers import counters_enabled, group_by_content_type, group_by_object
+from django_comments.models import CommentCounter
 
 register = template.Library()
 
+# Stand-ins for the per-object values of comment forms rendered with the
+# ``cache`` option. They are left unchanged by HTML escaping.
+FORM_PLACEHOLDER = "django-comments-placeholder-%s"
+FORM_PLACEHOLDERS = {
+    FORM_PLACEHOLDER % name: name
+    for name in ('content_type', 'object_pk', 'timestamp', 'security_hash', 'csrf_token')
+}
+FORM_PLACEHOLDER_RE = re.compile("|".join(map(re.escape, FORM_PLACEHOLDERS)))
+
 
 class BaseCommentNode(template.Node):
     """
@@ -23,6 +46,7 @@ class BaseCommentNode(template.Node):
         tokens = token.split_contents()
         if tokens[1] != 'for':
             raise template.TemplateSyntaxError("Second argument in %r tag must be 'for'" % tokens[0])
+        tokens, options = cls.parse_options(parser, tokens)
 
         # {% get_whatever for obj as varname %}
         if len(tokens) == 5:
@@ -31,6 +55,7 @@ class BaseCommentNode(template.Node):
             return cls(
                 object_expr=parser.compile_filter(tokens[2]),
                 as_varname=tokens[4],
+                **options
             )
 
         # {% get_whatever for app.model pk as varname %}
@@ -40,12 +65,22 @@ class BaseCommentNode(template.Node):
             return cls(
                 ctype=BaseCommentNode.lookup_content_type(tokens[2], tokens[0]),
                 object_pk_expr=parser.compile_filter(tokens[3]),
-                as_varname=tokens[5]
+                as_varname=tokens[5],
+                **options
             )
 
         else:
             raise template.TemplateSyntaxError("%r tag requires 4 or 5 arguments" % tokens[0])
 
+    @classmethod
+    def parse_options(cls, parser, tokens):
+        """
+        Split trailing options off ``tokens``. Returns the remaining tokens and
+        a dict of keyword arguments for the node. Subclasses accepting options
+        should override this.
+        """
+        return tokens, {}
+
     @staticmethod
     def lookup_content_type(token, tagname):
         try:
@@ -66,6 +101,18 @@ class BaseCommentNode(template.Node):
         self.object_pk_expr = object_pk_expr
         self.object_expr = object_expr
         self.comment = comment
+        # Content types of the models this node has rendered comments for.
+        self.ctype_cache = {}
+
+        # The is_public and is_removed fields are implementation details of the
+        # built-in comment model's spam filtering system, so they might not
+        # be present on a custom comment model subclass. If they exist, we
+        # should filter on them.
+        field_names = {f.name for f in self.comment_model._meta.fields}
+        self.filter_public = 'is_public' in field_names
+        self.hide_removed = getattr(settings, 'COMMENTS_HIDE_REMOVED', True)
+        self.filter_removed = self.hide_removed and 'is_removed' in field_names
+        self.select_user = 'user' in field_names
 
     def render(self, context):
         qs = self.get_queryset(context)
@@ -77,60 +124,305 @@ class BaseCommentNode(template.Node):
         if not object_pk:
             return self.comment_model.objects.none()
 
-        # Explicit SITE_ID takes precedence over request. This is also how
-        # get_current_site operates.
-        site_id = getattr(settings, "SITE_ID", None)
-        if not site_id and ('request' in context):
-            site_id = get_current_site(context['request']).pk
-
         qs = self.comment_model.objects.filter(
             content_type=ctype,
             object_pk=smart_str(object_pk),
-            site__pk=site_id,
         )
-
-        # The is_public and is_removed fields are implementation details of the
-        # built-in comment model's spam filtering system, so they might not
-        # be present on a custom comment model subclass. If they exist, we
-        # should filter on them.
-        field_names = [f.name for f in self.comment_model._meta.fields]
-        if 'is_public' in field_names:
+        return self.filter_queryset(context, qs)
+
+    def filter_queryset(self, context, qs):
+        """
+        Restrict ``qs`` to the comments that should be visible on the current
+        site.
+        """
+        qs = qs.filter(site__pk=self.get_site_id(context))
+        if self.filter_public:
             qs = qs.filter(is_public=True)
-        if getattr(settings, 'COMMENTS_HIDE_REMOVED', True) and 'is_removed' in field_names:
+        if self.filter_removed:
             qs = qs.filter(is_removed=False)
-        if 'user' in field_names:
+        if self.select_user:
             qs = qs.select_related('user')
         return qs
 
+    def get_site_id(self, context):
+        # Explicit SITE_ID takes precedence over request. This is also how
+        # get_current_site operates.
+        site_id = getattr(settings, "SITE_ID", None)
+        if not site_id and ('request' in context):
+            site_id = get_current_site(context['request']).pk
+        return site_id
+
+    def use_counters(self):
+        """
+        Whether counts can be read from the ``CommentCounter`` table, which
+        only holds counts of public, non-removed comments.
+        """
+        return counters_enabled() and self.hide_removed
+
     def get_target_ctype_pk(self, context):
         if self.object_expr:
             try:
                 obj = self.object_expr.resolve(context)
             except template.VariableDoesNotExist:
                 return None, None
-            return ContentType.objects.get_for_model(obj), obj.pk
+            return self.get_content_type(obj), obj.pk
         else:
             return self.ctype, self.object_pk_expr.resolve(context, ignore_failures=True)
 
+    def get_content_type(self, obj):
+        """
+        Return the content type of ``obj``, memoised per model class so that
+        nodes rendered in a loop skip the content type lookups.
+        """
+        try:
+            return self.ctype_cache[obj.__class__]
+        except KeyError:
+            ctype = self.ctype_cache[obj.__class__] = ContentType.objects.get_for_model(obj)
+            return ctype
+
     def get_context_value_from_queryset(self, context, qs):
         """Subclasses should override this."""
         raise NotImplementedError
 
 
+class CommentPage(list):
+    """
+    A page of comments, as returned by the comment list tags when a ``limit``
+    is given. ``next_cursor`` is the value to pass as ``after`` to get the
+    next page, or ``None`` if this is the last page.
+    """
+
+    def __init__(self, comments, next_cursor=None):
+        super().__init__(comments)
+        self.next_cursor = next_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+
+def encode_cursor(comment):
+    """
+    Return an opaque, URL-safe cursor pointing just after ``comment``.
+    """
+    value = "%s,%s" % (comment.submit_date.isoformat(), comment.pk)
+    return urlsafe_base64_encode(force_bytes(value))
+
+
+def decode_cursor(cursor):
+    """
+    Return the ``(submit_date, pk)`` pair encoded in ``cursor``, or ``None``
+    if ``cursor`` is not valid.
+    """
+    try:
+        submit_date, pk = force_str(urlsafe_base64_decode(cursor)).split(",", 1)
+        submit_date = parse_datetime(submit_date)
+    except ValueError:
+        return None
+    if submit_date is None:
+        return None
+    return submit_date, pk
+
+
 class CommentListNode(BaseCommentNode):
     """Insert a list of comments into the context."""
 
+    pagination_options = ('limit', 'after')
+
+    def __init__(self, limit=None, after=None, values=False, **kwargs):
+        super().__init__(**kwargs)
+        self.limit = limit
+        self.after = after
+        self.values = values
+
+    @classmethod
+    def parse_options(cls, parser, tokens):
+        """
+        Parse the optional ``limit [count]`` and ``after [cursor]`` options,
+        and the trailing ``values`` flag.
+        """
+        options = {}
+        # A trailing "values" after "as" or an option name is a variable name.
+        if len(tokens) > 5 and tokens[-1] == 'values' and tokens[-2] not in ('as',) + cls.pagination_options:
+            options['values'] = True
+            tokens = tokens[:-1]
+        while len(tokens) > 4 and tokens[-2] in cls.pagination_options and tokens[-2] not in options:
+            options[tokens[-2]] = parser.compile_filter(tokens[-1])
+            tokens = tokens[:-2]
+        return tokens, options
+
     def get_context_value_from_queryset(self, context, qs):
+        if self.limit is None and self.after is None:
+            return self.get_comments(qs)
+        return self.paginate(context, qs)
+
+    def get_comments(self, qs):
+        """
+        Return ``qs``, or with the ``values`` option, the list of its comments
+        as ``CommentRow``.
+        """
+        if self.values:
+            return self.comment_model.objects.rows(qs)
         return qs
 
+    def get_position(self, context):
+        """
+        Return the ``(submit_date, pk)`` pair of the ``after`` cursor, or
+        ``None`` if it's missing or invalid (in which case the list starts at
+        the first comment).
+        """
+        position = decode_cursor(self.after.resolve(context, ignore_failures=True) or '')
+        if position is None:
+            return None
+        submit_date, pk = position
+        try:
+            return submit_date, self.comment_model._meta.pk.to_python(pk)
+        except ValidationError:
+            return None
+
+    def paginate(self, context, qs):
+        """
+        Seek to the comments after the ``after`` cursor (ordered by
+        ``submit_date`` and primary key) and, if a ``limit`` was given, return
+        a ``CommentPage`` of at most that many comments.
+        """
+        qs = qs.order_by('submit_date', 'pk')
+        if self.after is not None:
+            position = self.get_position(context)
+            if position is not None:
+                submit_date, pk = position
+                # The redundant submit_date__gte lets the database seek the
+                # index to the cursor instead of scanning from the start.
+                qs = qs.filter(
+                    Q(submit_date__gt=submit_date) | Q(pk__gt=pk),
+                    submit_date__gte=submit_date,
+                )
+        if self.limit is None:
+            return self.get_comments(qs)
+        value = self.limit.resolve(context)
+        try:
+            limit = int(value)
+        except (TypeError, ValueError):
+            limit = 0
+        if limit < 1:
+            raise template.TemplateSyntaxError("Comment list 'limit' must be a positive integer, got %r" % value)
+
+        comments = list(self.get_comments(qs[:limit + 1]))
+        if len(comments) > limit:
+            return CommentPage(comments[:limit], encode_cursor(comments[limit - 1]))
+        return CommentPage(comments)
+
+
+class CommentTreeNode(BaseCommentNode):
+    """Insert the comments of an object, in thread order, into the context."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        if 'thread_path' not in {f.name for f in self.comment_model._meta.fields}:
+            raise template.TemplateSyntaxError(
+                "Comment trees require a comment model based on ThreadedCommentAbstractModel.")
+
+    def get_context_value_from_queryset(self, context, qs):
+        return qs.order_by('thread_path')
+
 
 class CommentCountNode(BaseCommentNode):
     """Insert a count of comments into the context."""
 
+    def render(self, context):
+        if not self.use_counters():
+            return super().render(context)
+        ctype, object_pk = self.get_target_ctype_pk(context)
+        if object_pk:
+            count = CommentCounter.objects.get_count(ctype, object_pk, self.get_site_id(context))
+        else:
+            count = 0
+        context[self.as_varname] = count
+        return ''
+
     def get_context_value_from_queryset(self, context, qs):
         return qs.count()
 
 
+class BaseCommentObjectListNode(BaseCommentNode):
+    """
+    Base class for the template tags handling the comments of a whole list of
+    objects at once.
+    """
+
+    @classmethod
+    def handle_token(cls, parser, token):
+        """Class method to parse get_comment_counts/lists and return a Node."""
+        tokens = token.split_contents()
+        if tokens[1] != 'for':
+            raise template.TemplateSyntaxError("Second argument in %r tag must be 'for'" % tokens[0])
+
+        # {% get_whatever for object_list as varname %}
+        if len(tokens) == 5:
+            if tokens[3] != 'as':
+                raise template.TemplateSyntaxError("Third argument in %r must be 'as'" % tokens[0])
+            return cls(
+                object_expr=parser.compile_filter(tokens[2]),
+                as_varname=tokens[4],
+            )
+
+        else:
+            raise template.TemplateSyntaxError("%r tag requires 4 arguments" % tokens[0])
+
+    def render(self, context):
+        try:
+            object_list = self.object_expr.resolve(context)
+        except template.VariableDoesNotExist:
+            object_list = None
+        context[self.as_varname] = self.get_context_value_from_object_list(context, object_list or [])
+        return ''
+
+    def get_context_value_from_object_list(self, context, object_list):
+        """Subclasses should override this."""
+        raise NotImplementedError
+
+
+class CommentCountsNode(BaseCommentObjectListNode):
+    """
+    Insert a dict mapping each object of a list to its number of comments
+    into the context.
+    """
+
+    def get_context_value_from_object_list(self, context, object_list):
+        """
+        Count the comments of every object in ``object_list`` with one grouped
+        query per content type.
+        """
+        object_list, objects_by_ctype = group_by_content_type(object_list)
+        counts = dict.fromkeys(object_list, 0)
+
+        for ctype, objects in objects_by_ctype.items():
+            if self.use_counters():
+                rows = CommentCounter.objects.filter(
+                    content_type=ctype,
+                    object_pk__in=objects,
+                    site__pk=self.get_site_id(context),
+                ).values_list('object_pk', 'count')
+            else:
+                qs = self.comment_model.objects.filter(content_type=ctype, object_pk__in=objects)
+                qs = self.filter_queryset(context, qs)
+                rows = qs.order_by().values_list('object_pk').annotate(count=Count('pk'))
+            for object_pk, count in rows:
+                counts[objects[object_pk]] = count
+        return counts
+
+
+class CommentListsNode(BaseCommentObjectListNode):
+    """
+    Insert a dict mapping each object of a list to its comments into the
+    context.
+    """
+
+    def get_context_value_from_object_list(self, context, object_list):
+        qs = self.filter_queryset(context, self.comment_model.objects.all())
+        return group_by_object(qs, object_list)
+
+
 class CommentFormNode(BaseCommentNode):
     """Insert a form for the comment model into the context."""
 
@@ -160,77 +452,147 @@ class CommentFormNode(BaseCommentNode):
 class RenderCommentFormNode(CommentFormNode):
     """Render the comment form directly"""
 
+    def __init__(self, cache=False, **kwargs):
+        super().__init__(**kwargs)
+        self.cache = cache
+
     @classmethod
     def handle_token(cls, parser, token):
         """Class method to parse render_comment_form and return a Node."""
         tokens = token.split_contents()
         if tokens[1] != 'for':
             raise template.TemplateSyntaxError("Second argument in %r tag must be 'for'" % tokens[0])
+        cache_form = len(tokens) > 3 and tokens[-1] == 'cache'
+        if cache_form:
+            tokens = tokens[:-1]
 
         # {% render_comment_form for obj %}
         if len(tokens) == 3:
-            return cls(object_expr=parser.compile_filter(tokens[2]))
+            return cls(object_expr=parser.compile_filter(tokens[2]), cache=cache_form)
 
         # {% render_comment_form for app.models pk %}
         elif len(tokens) == 4:
             return cls(
                 ctype=BaseCommentNode.lookup_content_type(tokens[2], tokens[0]),
-                object_pk_expr=parser.compile_filter(tokens[3])
+                object_pk_expr=parser.compile_filter(tokens[3]),
+                cache=cache_form,
             )
 
     def render(self, context):
         ctype, object_pk = self.get_target_ctype_pk(context)
         if object_pk:
-            template_search_list = [
-                "comments/%s/%s/form.html" % (ctype.app_label, ctype.model),
-                "comments/%s/form.html" % ctype.app_label,
-                "comments/form.html"
-            ]
-            context_dict = context.flatten()
-            context_dict['form'] = self.get_form(context)
-            formstr = render_to_string(template_search_list, context_dict)
-            return formstr
+            form_class = django_comments.get_form()
+            # Only the security fields of CommentSecurityForm can be filled in.
+            if not self.cache or not issubclass(form_class, CommentSecurityForm):
+                return self.render_form(context, ctype, self.get_form(context))
+            obj = self.get_object(context)
+            if not obj:
+                return self.render_form(context, ctype, None)
+            values = form_class.security_data_for(obj)
+            values['csrf_token'] = str(context.get('csrf_token') or '')
+            formstr = self.get_cached_form(context, ctype, obj, values['csrf_token'] not in ('', 'NOTPROVIDED'))
+            return FORM_PLACEHOLDER_RE.sub(
+                lambda match: conditional_escape(values[FORM_PLACEHOLDERS[match.group()]]), formstr,
+            )
         else:
             return ''
 
+    def get_cached_form(self, context, ctype, obj, has_csrf_token):
+        """
+        Return the form for objects of ``ctype`` rendered with placeholders
+        for the per-object values, from the current render or the cache if
+        possible.
+        """
+        key = caching.get_form_cache_key(ctype.pk, get_language(), context.get('next'), has_csrf_token)
+        try:
+            return context.render_context[key]
+        except KeyError:
+            pass
+        formstr = cache.get(key)
+        if formstr is None:
+            form = django_comments.get_form()(obj)
+            form.initial.update({name: placeholder for placeholder, name in FORM_PLACEHOLDERS.items()})
+            with context.push(csrf_token=FORM_PLACEHOLDER % 'csrf_token' if has_csrf_token else None):
+                formstr = self.render_form(context, ctype, form)
+            cache.set(key, formstr)
+        context.render_context[key] = formstr
+        return formstr
+
+    def render_form(self, context, ctype, form):
+        template_name = templating.select_template_name('form', ctype.app_label, ctype.model)
+        context_dict = context.flatten()
+        context_dict['form'] = form
+        formstr = render_to_string(template_name, context_dict)
+        return formstr
+
 
 class RenderCommentListNode(CommentListNode):
     """Render the comment list directly"""
 
+    def __init__(self, cache=False, **kwargs):
+        super().__init__(**kwargs)
+        self.cache = cache
+
+    @classmethod
+    def parse_options(cls, parser, tokens):
+        """
+        Parse the optional trailing ``cache`` flag, then the pagination
+        options.
+        """
+        cache_list = len(tokens) > 3 and tokens[-1] == 'cache'
+        if cache_list:
+            tokens = tokens[:-1]
+        tokens, options = super().parse_options(parser, tokens)
+        options['cache'] = cache_list
+        return tokens, options
+
     @classmethod
     def handle_token(cls, parser, token):
         """Class method to parse render_comment_list and return a Node."""
         tokens = token.split_contents()
         if tokens[1] != 'for':
             raise template.TemplateSyntaxError("Second argument in %r tag must be 'for'" % tokens[0])
+        tokens, options = cls.parse_options(parser, tokens)
 
         # {% render_comment_list for obj %}
         if len(tokens) == 3:
-            return cls(object_expr=parser.compile_filter(tokens[2]))
+            return cls(object_expr=parser.compile_filter(tokens[2]), **options)
 
         # {% render_comment_list for app.models pk %}
         elif len(tokens) == 4:
             return cls(
                 ctype=BaseCommentNode.lookup_content_type(tokens[2], tokens[0]),
-                object_pk_expr=parser.compile_filter(tokens[3])
+                object_pk_expr=parser.compile_filter(tokens[3]),
+                **options
             )
 
     def render(self, context):
         ctype, object_pk = self.get_target_ctype_pk(context)
         if object_pk:
-            template_search_list = [
-                "comments/%s/%s/list.html" % (ctype.app_label, ctype.model),
-                "comments/%s/list.html" % ctype.app_label,
-                "comments/list.html"
-            ]
-            qs = self.get_queryset(context)
-            context_dict = context.flatten()
-            context_dict['comment_list'] = self.get_context_value_from_queryset(context, qs)
-            liststr = render_to_string(template_search_list, context_dict)
+            if not self.cache:
+                return self.render_list(context, ctype)
+            key = caching.get_list_cache_key(
+                ctype.pk, object_pk, self.get_site_id(context),
+                get_language(), timezone.get_current_timezone_name(),
+                self.limit and self.limit.resolve(context),
+                self.after and self.after.resolve(context, ignore_failures=True),
+            )
+            liststr = cache.get(key)
+            if liststr is None:
+                liststr = self.render_list(context, ctype)
+                cache.set(key, liststr)
             return liststr
         else:
             return ''
 
+    def render_list(self, context, ctype):
+        template_name = templating.select_template_name('list', ctype.app_label, ctype.model)
+        qs = self.get_queryset(context)
+        context_dict = context.flatten()
+        context_dict['comment_list'] = self.get_context_value_from_queryset(context, qs)
+        liststr = render_to_string(template_name, context_dict)
+        return liststr
+
 
 # We could just register each classmethod directly, but then we'd lose out on
 # the automagic docstrings-into-admin-docs tricks. So each node gets a cute
@@ -258,6 +620,28 @@ def get_comment_count(parser, token):
     return CommentCountNode.handle_token(parser, token)
 
 
+@register.tag
+def get_comment_counts(parser, token):
+    """
+    Gets the comment counts for a list of objects in a single query per
+    content type and populates the template context with a dict mapping each
+    object to its count, whose name is defined by the 'as' clause.
+
+    Syntax::
+
+        {% get_comment_counts for [object_list] as [varname] %}
+
+    Example usage::
+
+        {% get_comment_counts for entry_list as comment_counts %}
+        {% for entry, count in comment_counts.items %}
+            ...
+        {% endfor %}
+
+    """
+    return CommentCountsNode.handle_token(parser, token)
+
+
 @register.tag
 def get_comment_list(parser, token):
     """
@@ -269,6 +653,8 @@ def get_comment_list(parser, token):
 
         {% get_comment_list for [object] as [varname]  %}
         {% get_comment_list for [app].[model] [object_id] as [varname]  %}
+        {% get_comment_list for [object] as [varname] limit [count] after [cursor] %}
+        {% get_comment_list for [object] as [varname] values %}
 
     Example usage::
 
@@ -277,10 +663,63 @@ def get_comment_list(parser, token):
             ...
         {% endfor %}
 
+    With ``limit``, a page of at most ``count`` comments is returned. Its
+    ``next_cursor`` attribute can be passed as ``after`` to get the next page.
+
+    With ``values`` at the end, a list of lightweight, read-only
+    ``CommentRow`` is returned instead of model instances.
+
     """
     return CommentListNode.handle_token(parser, token)
 
 
+@register.tag
+def get_comment_lists(parser, token):
+    """
+    Gets the comments of a list of objects in a single query per content type
+    and populates the template context with a dict mapping each object to its
+    list of comments, whose name is defined by the 'as' clause.
+
+    Syntax::
+
+        {% get_comment_lists for [object_list] as [varname] %}
+
+    Example usage::
+
+        {% get_comment_lists for entry_list as comment_map %}
+        {% for entry, comment_list in comment_map.items %}
+            ...
+        {% endfor %}
+
+    """
+    return CommentListsNode.handle_token(parser, token)
+
+
+@register.tag
+def get_comment_tree(parser, token):
+    """
+    Gets the comments of an object in thread order, each thread depth first
+    with the replies in posting order, with a single query, and populates the
+    template context with a variable containing that value, whose name is
+    defined by the 'as' clause. Requires a comment model based on
+    ``ThreadedCommentAbstractModel``.
+
+    Syntax::
+
+        {% get_comment_tree for [object] as [varname] %}
+        {% get_comment_tree for [app].[model] [object_id] as [varname] %}
+
+    Example usage::
+
+        {% get_comment_tree for event as comment_tree %}
+        {% for comment in comment_tree %}
+            <div style="margin-left: {{ comment.depth }}em">...</div>
+        {% endfor %}
+
+    """
+    return CommentTreeNode.handle_token(parser, token)
+
+
 @register.tag
 def render_comment_list(parser, token):
     """
@@ -291,11 +730,16 @@ def render_comment_list(parser, token):
 
         {% render_comment_list for [object] %}
         {% render_comment_list for [app].[model] [object_id] %}
+        {% render_comment_list for [object] limit [count] after [cursor] %}
+        {% render_comment_list for [object] cache %}
 
     Example usage::
 
         {% render_comment_list for event %}
 
+    With ``cache``, the rendered list is stored in the cache until a comment
+    on the object is posted, flagged, saved or deleted.
+
     """
     return RenderCommentListNode.handle_token(parser, token)
 
@@ -323,6 +767,11 @@ def render_comment_form(parser, token):
 
         {% render_comment_form for [object] %}
         {% render_comment_form for [app].[model] [object_id] %}
+        {% render_comment_form for [object] cache %}
+
+    With ``cache``, the form is rendered once per content type and stored in
+    the cache, and only its hidden security fields and CSRF token are filled
+    in for each object.
     """
     return RenderCommentFormNode.handle_token(parser, token)
 
@@ -0,0 +1,72 @@
+"""
+Resolution of the comment templates.
+
+Each comment template can be overridden per model or per app, so rendering
+one means probing up to five template names. The name found first is
+remembered per template kind, app label and model name, so later renders load
+it directly. The remembered names are forgotten when a template file changes
+under the development server's autoreloader, or when the ``TEMPLATES``
+setting changes.
+"""
+from django.core.signals import setting_changed
+from django.template.loader import select_template
+from django.utils.autoreload import file_changed
+
+_template_names = {}
+
+
+def get_template_names(kind, app_label, model_name):
+    """
+    Return the names of the ``kind`` templates (e.g. ``"list"``) that may be
+    used for comments on ``app_label.model_name``, most specific first.
+    """
+    names = [
+        "comments/%s/%s/%s.html" % (app_label, model_name, kind),
+        "comments/%s/%s.html" % (app_label, kind),
+        "comments/%s.html" % kind,
+    ]
+    if kind == "preview":
+        # These first two exist for purely historical reasons.
+        # Django v1.0 and v1.1 allowed the underscore format for
+        # preview templates, so we have to preserve that format.
+        names[:0] = [
+            "comments/%s_%s_preview.html" % (app_label, model_name),
+            "comments/%s_preview.html" % app_label,
+        ]
+    return names
+
+
+def select_template_name(kind, app_label, model_name):
+    """
+    Return the name of the ``kind`` template to use for comments on
+    ``app_label.model_name``. Raise ``TemplateDoesNotExist`` if there's none.
+    """
+    key = (kind, app_label, model_name)
+    try:
+        return _template_names[key]
+    except KeyError:
+        pass
+    template = select_template(get_template_names(kind, app_label, model_name))
+    name = _template_names[key] = template.origin.template_name
+    return name
+
+
+def clear_cache():
+    _template_names.clear()
+
+
+def template_changed(sender, file_path, **kwargs):
+    # A template may have been added or removed. Unlike Django's own
+    # receiver, don't return True, which would prevent the reload.
+    if file_path.suffix != ".py":
+        clear_cache()
+
+
+def templates_setting_changed(sender, setting, **kwargs):
+    if setting == "TEMPLATES":
+        clear_cache()
+
+
+def connect():
+    file_changed.connect(template_changed, dispatch_uid="django_comments_template_changed")
+    setting_changed.connect(templates_setting_changed, dispatch_uid="django_comments_templates_setting_changed")
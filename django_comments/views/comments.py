@@ -10,7 +10,9 @@ from django.views.decorators.csrf import csrf_protect
 from django.views.decorators.http import require_POST
 
 import django_comments
-from django_comments import signals
+from django_comments import signals, templating
+from django_comments.forms import CommentSecurityForm
+from django_comments.ratelimit import is_rate_limited
 from django_comments.views.utils import next_redirect, confirmation_view
 
 
@@ -27,6 +29,20 @@ class CommentPostBadRequest(http.HttpResponseBadRequest):
             self.content = render_to_string("comments/400-debug.html", {"why": why})
 
 
+class CommentPostTooManyRequests(http.HttpResponse):
+    """
+    Response returned when the poster exceeded the ``COMMENTS_RATE_LIMITS``
+    of the content type. ``Retry-After`` is the length of the limit's window.
+    """
+    status_code = 429
+
+    def __init__(self, why, retry_after):
+        super().__init__()
+        self['Retry-After'] = str(retry_after)
+        if settings.DEBUG:
+            self.content = why
+
+
 @csrf_protect
 @require_POST
 def post_comment(request, next=None, using=None):
@@ -49,6 +65,21 @@ def post_comment(request, next=None, using=None):
     object_pk = data.get("object_pk")
     if ctype is None or object_pk is None:
         return CommentPostBadRequest("Missing content_type or object_pk field.")
+
+    # Reject forged or expired posts before any query, if the form checks
+    # them the standard way.
+    form_class = django_comments.get_form()
+    if issubclass(form_class, CommentSecurityForm) and form_class.can_verify_security_data():
+        if not form_class.verify_security_data(data):
+            return CommentPostBadRequest("The comment form failed security verification.")
+
+    # Previews don't count towards the rate limits.
+    if "preview" not in data:
+        retry_after = is_rate_limited(request, ctype)
+        if retry_after is not None:
+            return CommentPostTooManyRequests(
+                "Too many comments posted on content-type %r." % escape(ctype), retry_after)
+
     try:
         model = apps.get_model(*ctype.split(".", 1))
         target = model._default_manager.using(using).get(pk=object_pk)
@@ -71,7 +102,7 @@ def post_comment(request, next=None, using=None):
     preview = "preview" in data
 
     # Construct the comment form
-    form = django_comments.get_form()(target, data=data)
+    form = form_class(target, data=data)
 
     # Check security information
     if form.security_errors():
@@ -80,18 +111,10 @@ def post_comment(request, next=None, using=None):
 
     # If there are errors or if we requested a preview show the comment
     if form.errors or preview:
-        template_list = [
-            # These first two exist for purely historical reasons.
-            # Django v1.0 and v1.1 allowed the underscore format for
-            # preview templates, so we have to preserve that format.
-            "comments/%s_%s_preview.html" % (model._meta.app_label, model._meta.model_name),
-            "comments/%s_preview.html" % model._meta.app_label,
-            # Now the usual directory based template hierarchy.
-            "comments/%s/%s/preview.html" % (model._meta.app_label, model._meta.model_name),
-            "comments/%s/preview.html" % model._meta.app_label,
-            "comments/preview.html",
-        ]
-        return render(request, template_list, {
+        template_name = templating.select_template_name(
+            "preview", model._meta.app_label, model._meta.model_name,
+        )
+        return render(request, template_name, {
                 "comment": form.data.get("comment", ""),
                 "form": form,
                 "next": data.get("next", next),
@@ -99,7 +122,10 @@ def post_comment(request, next=None, using=None):
         )
 
     # Otherwise create the comment
-    comment = form.get_comment_object(site_id=get_current_site(request).id)
+    try:
+        comment = form.get_comment_object(site_id=get_current_site(request).id)
+    except ValidationError as e:
+        return CommentPostBadRequest("The comment can't be created: %s" % escape(" ".join(e.messages)))
     comment.ip_address = request.META.get("REMOTE_ADDR", None) or None
     if request.user.is_authenticated:
         comment.user = request.user
@@ -1,10 +1,14 @@
 from django.contrib.auth.decorators import login_required, permission_required
 from django.contrib.sites.shortcuts import get_current_site
+from django.db import transaction
+from django.db.models import Q
 from django.shortcuts import get_object_or_404, render
+from django.utils import timezone
 from django.views.decorators.csrf import csrf_protect
 
 import django_comments
 from django_comments import signals
+from django_comments.counters import update_counters
 from django_comments.views.utils import next_redirect, confirmation_view
 
 
@@ -151,6 +155,76 @@ def perform_approve(request, comment):
     )
 
 
+# Bulk versions of the above, for moderating many comments at once (e.g. from
+# admin actions). They flag and update all the comments with a few queries
+# and send a single comments_were_flagged signal instead of saving every
+# comment and sending comment_was_flagged for each.
+
+def perform_bulk_flag(request, queryset):
+    """
+    Flag all the comments in ``queryset`` for removal. Returns the number of
+    comments.
+    """
+    return bulk_flag(request, queryset, django_comments.models.CommentFlag.SUGGEST_REMOVAL)
+
+
+def perform_bulk_delete(request, queryset):
+    """
+    Mark all the comments in ``queryset`` as removed. Returns the number of
+    comments.
+    """
+    return bulk_flag(request, queryset, django_comments.models.CommentFlag.MODERATOR_DELETION,
+                     is_removed=True)
+
+
+def perform_bulk_approve(request, queryset):
+    """
+    Mark all the comments in ``queryset`` as public and non-removed. Returns
+    the number of comments.
+    """
+    return bulk_flag(request, queryset, django_comments.models.CommentFlag.MODERATOR_APPROVAL,
+                     is_public=True, is_removed=False)
+
+
+def bulk_flag(request, queryset, flag, **changes):
+    """
+    Flag the comments in ``queryset`` with ``flag`` on behalf of the request's
+    user and apply ``changes`` (to ``is_public`` and/or ``is_removed``) to
+    them.
+    """
+    model = queryset.model
+    comment_ids = list(queryset.order_by().values_list('pk', flat=True))
+    if not comment_ids:
+        return 0
+
+    CommentFlag = django_comments.models.CommentFlag
+    flag_date = timezone.now()
+    with transaction.atomic(using=queryset.db):
+        CommentFlag.objects.bulk_create(
+            [CommentFlag(comment_id=pk, user=request.user, flag=flag, flag_date=flag_date) for pk in comment_ids],
+            batch_size=1000,
+            ignore_conflicts=True,
+        )
+        comments = model._default_manager.using(queryset.db).filter(pk__in=comment_ids)
+        hidden = Q(is_public=False) | Q(is_removed=True)
+        if changes.get('is_removed') or changes.get('is_public') is False:
+            # Visible comments are being hidden.
+            update_counters(comments.exclude(hidden), -1)
+        elif changes.get('is_public') and changes.get('is_removed') is False:
+            # Hidden comments are being shown.
+            update_counters(comments.filter(hidden), 1)
+        if changes:
+            comments.update(**changes)
+
+    signals.comments_were_flagged.send(
+        sender=model,
+        comment_ids=comment_ids,
+        flag=flag,
+        request=request,
+    )
+    return len(comment_ids)
+
+
 # Confirmation views.
 
 flag_done = confirmation_view(
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+
+"""
+Benchmark the security data of the comment form: how many forms per second
+can be created (which generates the timestamp and security hash), verified
+and rendered with ``{% render_comment_form %}`` (with and without the
+``cache`` option), and how many security hashes per second are generated.
+
+Usage::
+
+    python benchmark_comment_form.py [--number N]
+
+The database is an in-memory SQLite database holding a single article.
+"""
+
+import argparse
+import sys
+import time
+import timeit
+
+import runtests  # noqa: F401 (configures settings)
+
+import django
+from django.conf import settings
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--number', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=5)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    settings.DATABASES['default']['NAME'] = ':memory:'
+    settings.ROOT_URLCONF = 'testapp.urls_default'
+    django.setup()
+
+    from django.core.management import call_command
+    call_command('migrate', run_syncdb=True, verbosity=0)
+
+    from django.template import Context, Template
+    from django_comments.forms import CommentForm
+    from testapp.models import Article, Author
+
+    article = Article.objects.create(author=Author.objects.create(first_name="John", last_name="Smith"),
+                                     headline="Article")
+    data = CommentForm(article).initial
+
+    def create():
+        CommentForm(article)
+
+    def verify():
+        CommentForm(article, data=data)
+        CommentForm.verify_security_data(data)
+
+    form = CommentForm(article)
+
+    def security_hash():
+        form.initial_security_hash(int(time.time()))
+
+    render_template = Template("{% load comments %}{% render_comment_form for article %}")
+    render_cached_template = Template("{% load comments %}{% render_comment_form for article cache %}")
+
+    def render():
+        render_template.render(Context({'article': article}))
+
+    def render_cached():
+        render_cached_template.render(Context({'article': article}))
+
+    for name, func in (('create', create), ('create + verify', verify), ('security hash', security_hash),
+                       ('render', render), ('render cached', render_cached)):
+        best = min(timeit.repeat(func, number=args.number, repeat=args.repeat))
+        print("%-16s %10.0f per second" % (name, args.number / best))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
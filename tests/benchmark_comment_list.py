@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+
+"""
+Benchmark the comment list queries of the template tags with and without the
+composite indexes added in migrations 0006 and 0007.
+
+Usage::
+
+    python benchmark_comment_list.py [--comments N] [--objects N] [--database PATH]
+
+The comments are spread over ``--objects`` articles with the most commented
+article (the one that's queried) holding a tenth of them. The database is a
+SQLite file, created from scratch unless ``--reuse`` is given.
+"""
+
+import argparse
+import datetime
+import importlib
+import os
+import sys
+import tempfile
+import time
+
+import runtests  # noqa: F401 (configures settings)
+
+import django
+from django.conf import settings
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--comments', type=int, default=2000000)
+    parser.add_argument('--objects', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--database', default=os.path.join(tempfile.gettempdir(), 'comments_benchmark.sqlite3'))
+    parser.add_argument('--reuse', action='store_true', help='Reuse an existing database')
+    return parser.parse_args()
+
+
+def populate(args):
+    from django.contrib.contenttypes.models import ContentType
+    from django.contrib.sites.models import Site
+    from django_comments.models import Comment
+    from testapp.models import Article, Author
+
+    author = Author.objects.create(first_name="John", last_name="Smith")
+    Article.objects.bulk_create(
+        Article(pk=pk, author=author, headline="Article %d" % pk) for pk in range(1, args.objects + 1)
+    )
+    ct = ContentType.objects.get_for_model(Article)
+    site = Site.objects.get_current()
+    start = datetime.datetime(2020, 1, 1)
+    hot = args.comments // 10
+
+    def comments():
+        for i in range(args.comments):
+            # Every tenth comment goes to article 1, the rest are spread out.
+            object_pk = 1 if i < hot else 2 + i % (args.objects - 1)
+            yield Comment(
+                content_type=ct,
+                object_pk=str(object_pk),
+                site=site,
+                user_name="Joe Somebody",
+                comment="Comment %d" % i,
+                submit_date=start + datetime.timedelta(seconds=i),
+                is_public=i % 50 != 0,
+                is_removed=i % 97 == 0,
+            )
+
+    Comment.objects.bulk_create(comments(), batch_size=10000)
+
+
+def measure(label, args):
+    from django.contrib.contenttypes.models import ContentType
+    from django.template import Context, Template
+    from django_comments.models import Comment
+    from django_comments.templatetags.comments import encode_cursor
+    from testapp.models import Article
+
+    article = Article.objects.get(pk=1)
+    visible = Comment.objects.filter(
+        content_type=ContentType.objects.get_for_model(article),
+        object_pk="1",
+        site__pk=settings.SITE_ID,
+        is_public=True,
+        is_removed=False,
+    )
+    # A cursor near the end of the thread.
+    cursor = encode_cursor(visible.order_by('-submit_date')[100])
+    tags = {
+        'count': "{% get_comment_count for a as n %}",
+        'first page': "{% get_comment_list for a as cl limit 50 %}{% for c in cl %}{% endfor %}",
+        'last page': "{% get_comment_list for a as cl limit 50 after cursor %}{% for c in cl %}{% endfor %}",
+    }
+
+    print(label)
+    for name, tag in tags.items():
+        t = Template("{% load comments %}" + tag)
+        timings = []
+        for _ in range(args.repeat):
+            began = time.perf_counter()
+            t.render(Context({'a': article, 'cursor': cursor}))
+            timings.append(time.perf_counter() - began)
+        timings.sort()
+        print("  %-10s median %8.2f ms" % (name, 1000 * timings[len(timings) // 2]))
+
+    print("  plan of the first page query:")
+    for line in visible.order_by('submit_date', 'pk')[:51].explain().splitlines():
+        print("    " + line)
+
+
+def main():
+    args = parse_args()
+    if not args.reuse and os.path.exists(args.database):
+        os.remove(args.database)
+    settings.DATABASES['default']['NAME'] = args.database
+    django.setup()
+
+    from django.core.management import call_command
+    from django.db import connection
+
+    call_command('migrate', run_syncdb=True, verbosity=0)
+    from django_comments.models import Comment
+    if not Comment.objects.exists():
+        began = time.perf_counter()
+        populate(args)
+        print("Inserted %d comments in %.1f s" % (Comment.objects.count(), time.perf_counter() - began))
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+
+    visible_index = importlib.import_module(
+        'django_comments.migrations.0010_add_visible_comments_index').VISIBLE_COMMENTS_INDEX
+    indexes = [index for index in Comment._meta.indexes if index.name == 'django_comm_object_list_idx']
+    indexes.append(visible_index)
+    with connection.schema_editor() as editor:
+        for index in indexes:
+            editor.remove_index(Comment, index)
+    measure("Without composite indexes:", args)
+
+    with connection.schema_editor() as editor:
+        for index in indexes:
+            editor.add_index(Comment, index)
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+    measure("With composite indexes:", args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+
+"""
+Benchmark fetching a comment thread for display as model instances or as
+``CommentRow``: the time to fetch the comments and read the fields a comment
+list shows, and the memory the fetched comments take.
+
+Usage::
+
+    python benchmark_comment_rows.py [--comments N]
+
+The database is an in-memory SQLite database. Half the comments are posted by
+authenticated users.
+"""
+
+import argparse
+import sys
+import timeit
+import tracemalloc
+
+import runtests  # noqa: F401 (configures settings)
+
+import django
+from django.conf import settings
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--comments', type=int, default=1000)
+    parser.add_argument('--number', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=5)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    settings.DATABASES['default']['NAME'] = ':memory:'
+    django.setup()
+
+    from django.core.management import call_command
+    call_command('migrate', run_syncdb=True, verbosity=0)
+
+    from django.contrib.auth.models import User
+    from django_comments.models import Comment
+    from testapp.models import Article, Author
+
+    article = Article.objects.create(author=Author.objects.create(first_name="John", last_name="Smith"),
+                                     headline="Article")
+    users = [
+        User.objects.create(username="user%d" % i, first_name="First", last_name="Last %d" % i)
+        for i in range(10)
+    ]
+    for i in range(args.comments):
+        Comment.objects.create(
+            content_object=article, site_id=settings.SITE_ID, comment="Comment %d " % i * 10,
+            user=users[i % 10] if i % 2 else None, user_name="Anonymous %d" % i,
+        )
+    qs = Comment.objects.visible().filter(object_pk=str(article.pk))
+
+    def instances():
+        return [(c.id, c.name, c.email, c.url, c.submit_date, c.comment) for c in qs.all()]
+
+    def rows():
+        return [(c.id, c.name, c.email, c.url, c.submit_date, c.comment) for c in Comment.objects.rows(qs)]
+
+    assert instances() == rows()
+
+    for name, fetch, func in (('instances', lambda: list(qs.all()), instances),
+                              ('rows', lambda: Comment.objects.rows(qs), rows)):
+        best = min(timeit.repeat(func, number=args.number, repeat=args.repeat)) / args.number
+        tracemalloc.start()
+        comments = fetch()  # noqa: F841
+        size, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print("%-10s %8.2f ms %10.0f KiB" % (name, best * 1000, size / 1024))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
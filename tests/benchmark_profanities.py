@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+
+"""
+Benchmark the profanity check of CommentDetailsForm.clean_comment: the
+compiled matcher against the former list comprehension.
+
+Usage::
+
+    python benchmark_profanities.py [--words N] [--length N] [--repeat N]
+
+The word list holds ``--words`` random words and the comment ``--length``
+characters of text which doesn't contain any of them, the common case.
+"""
+
+import argparse
+import random
+import string
+import sys
+import timeit
+
+import runtests  # noqa: F401 (configures settings)
+
+import django
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--words', type=int, default=2000)
+    parser.add_argument('--length', type=int, default=3000)
+    parser.add_argument('--repeat', type=int, default=200)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    django.setup()
+
+    from django.test.utils import override_settings
+    from django_comments.profanities import get_profanity_matcher
+
+    rng = random.Random(0)
+    comment = ''.join(rng.choice(string.ascii_lowercase + '    ') for _ in range(args.length))
+    words = []
+    while len(words) < args.words:
+        word = ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 8)))
+        if word not in comment:
+            words.append(word)
+
+    def list_comprehension():
+        return [w for w in words if w in comment.lower()]
+
+    for whole_words in (False, True):
+        with override_settings(PROFANITIES_LIST=words, COMMENTS_PROFANITIES_WHOLE_WORDS=whole_words):
+            get_profanity_matcher()
+
+            def matcher():
+                return get_profanity_matcher().find(comment)
+
+            print("%d words, %d characters, whole_words=%s" % (args.words, args.length, whole_words))
+            for name, func in (('list comprehension', list_comprehension), ('matcher', matcher)):
+                best = min(timeit.repeat(func, number=1, repeat=args.repeat))
+                print("  %-20s best %8.3f ms" % (name, 1000 * best))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -5,6 +5,9 @@ more information.
 
 from django.db import models
 
+from django_comments.abstracts import ThreadedCommentAbstractModel
+from django_comments.fields import CommentsRelation
+
 
 class Author(models.Model):
     first_name = models.CharField(max_length=30)
@@ -28,9 +31,15 @@ class Entry(models.Model):
     pub_date = models.DateField()
     enable_comments = models.BooleanField(default=False)
 
+    comments = CommentsRelation()
+
     def __str__(self):
         return self.title
 
 
 class Book(models.Model):
     dewey_decimal = models.DecimalField(primary_key=True, decimal_places=2, max_digits=5)
+
+
+class ThreadedComment(ThreadedCommentAbstractModel):
+    pass
@@ -0,0 +1,30 @@
+from io import StringIO
+
+from django.core.management import call_command
+
+from django_comments.abstracts import get_comment_hash
+from django_comments.models import Comment
+
+from . import CommentTestCase
+
+
+class BackfillCommentHashesTests(CommentTestCase):
+
+    def testBackfill(self):
+        self.createSomeComments()
+        Comment.objects.update(comment_hash='')
+
+        out = StringIO()
+        call_command("backfill_comment_hashes", "--batch-size", "3", stdout=out)
+
+        self.assertIn("Computed the hash of 4 comments", out.getvalue())
+        for c in Comment.objects.all():
+            self.assertEqual(c.comment_hash, get_comment_hash(c.comment))
+
+    def testSkipsHashedComments(self):
+        self.createSomeComments()
+
+        out = StringIO()
+        call_command("backfill_comment_hashes", stdout=out)
+
+        self.assertIn("Computed the hash of 0 comments", out.getvalue())
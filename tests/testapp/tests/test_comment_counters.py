@@ -0,0 +1,177 @@
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.template import Context, Template
+from django.test.client import RequestFactory
+from django.test.utils import override_settings
+
+from django_comments import signals
+from django_comments.models import Comment, CommentCounter
+from django_comments.views.moderation import perform_approve, perform_delete
+
+from . import CommentTestCase
+from testapp.models import Article, Author
+
+
+@override_settings(COMMENTS_USE_COUNTERS=True)
+class CommentCounterTests(CommentTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.request = RequestFactory().post("/")
+        self.request.user = self.user
+
+    def getCount(self, obj):
+        return Comment.objects.count_for_object(obj)
+
+    def testRebuild(self):
+        self.createSomeComments()
+        # Counters drifted, e.g. comments added before enabling counters.
+        CommentCounter.objects.all().delete()
+        call_command("rebuild_comment_counters", verbosity=0)
+        self.assertEqual(CommentCounter.objects.count(), 3)
+        self.assertEqual(self.getCount(Article.objects.get(pk=1)), 2)
+        self.assertEqual(self.getCount(Author.objects.get(pk=1)), 1)
+        self.assertEqual(self.getCount(Article.objects.get(pk=2)), 0)
+
+    def testPostIncrements(self):
+        a = Article.objects.get(pk=1)
+        self.client.post("/post/", self.getValidData(a))
+        self.assertEqual(self.getCount(a), 1)
+
+    def testDuplicatePostIncrementsOnce(self):
+        a = Article.objects.get(pk=1)
+        data = self.getValidData(a)
+        self.client.post("/post/", data)
+        self.client.post("/post/", data)
+        self.assertEqual(Comment.objects.count(), 1)
+        self.assertEqual(self.getCount(a), 1)
+
+    def testCreateAndDelete(self):
+        c1, c2, c3, c4 = self.createSomeComments()
+        a = Article.objects.get(pk=1)
+        self.assertEqual(self.getCount(a), 2)
+        c1.delete()
+        self.assertEqual(self.getCount(a), 1)
+        # Saving an existing comment doesn't count it again.
+        c3.save()
+        self.assertEqual(self.getCount(a), 1)
+
+    def testPostNonPublicDoesNotIncrement(self):
+        def receive(sender, comment, **kwargs):
+            comment.is_public = False
+
+        signals.comment_will_be_posted.connect(receive)
+        try:
+            a = Article.objects.get(pk=1)
+            self.client.post("/post/", self.getValidData(a))
+        finally:
+            signals.comment_will_be_posted.disconnect(receive)
+        self.assertEqual(Comment.objects.count(), 1)
+        self.assertEqual(self.getCount(a), 0)
+
+    def testRemoveAndApprove(self):
+        c1, c2, c3, c4 = self.createSomeComments()
+        call_command("rebuild_comment_counters", verbosity=0)
+        a = Article.objects.get(pk=1)
+
+        perform_delete(self.request, c1)
+        self.assertEqual(self.getCount(a), 1)
+        # Removing an already removed comment doesn't change the count.
+        perform_delete(self.request, c1)
+        self.assertEqual(self.getCount(a), 1)
+
+        perform_approve(self.request, c1)
+        self.assertEqual(self.getCount(a), 2)
+        perform_approve(self.request, c1)
+        self.assertEqual(self.getCount(a), 2)
+
+    def testSaveTogglesCount(self):
+        c1, c2, c3, c4 = self.createSomeComments()
+        a = Article.objects.get(pk=1)
+        c1.is_public = False
+        c1.save()
+        self.assertEqual(self.getCount(a), 1)
+        c1.is_removed = True
+        c1.save()
+        self.assertEqual(self.getCount(a), 1)
+        c1.is_public = True
+        c1.save()
+        self.assertEqual(self.getCount(a), 1)
+        c1.is_removed = False
+        c1.save()
+        self.assertEqual(self.getCount(a), 2)
+        c3.is_removed = True
+        c3.save()
+        self.assertEqual(self.getCount(a), 1)
+        # Deleting a comment that isn't counted anymore doesn't uncount it.
+        c3.delete()
+        self.assertEqual(self.getCount(a), 1)
+
+    @override_settings(ROOT_URLCONF='testapp.urls_admin')
+    def testAdminChangeTogglesCount(self):
+        c1, c2, c3, c4 = self.createSomeComments()
+        a = Article.objects.get(pk=1)
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "admin"))
+        data = {
+            "content_type": c1.content_type_id, "object_pk": c1.object_pk, "site": c1.site_id,
+            "user_name": c1.user_name, "user_email": c1.user_email, "user_url": c1.user_url,
+            "comment": c1.comment, "submit_date_0": "2024-01-01", "submit_date_1": "12:00:00",
+            "is_public": "on",
+        }
+        url = "/admin/django_comments/comment/%s/change/" % c1.pk
+        response = self.client.post(url, dict(data, is_removed="on"))
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.getCount(a), 1)
+        self.client.post(url, data)
+        self.assertEqual(self.getCount(a), 2)
+
+    def testDeleteDecrements(self):
+        c1, c2, c3, c4 = self.createSomeComments()
+        call_command("rebuild_comment_counters", verbosity=0)
+        c1.delete()
+        self.assertEqual(self.getCount(Article.objects.get(pk=1)), 1)
+
+    def testCountNeverNegative(self):
+        c1, c2, c3, c4 = self.createSomeComments()
+        CommentCounter.objects.all().delete()
+        c1.delete()
+        self.assertEqual(CommentCounter.objects.count(), 0)
+        CommentCounter.objects.adjust(c2.content_type_id, c2.object_pk, c2.site_id, 1)
+        CommentCounter.objects.adjust(c2.content_type_id, c2.object_pk, c2.site_id, -2)
+        self.assertEqual(self.getCount(Author.objects.get(pk=1)), 0)
+
+    def testTemplateTagsReadCounters(self):
+        self.createSomeComments()
+        call_command("rebuild_comment_counters", verbosity=0)
+        # Counters are read even if they've drifted from the comments table.
+        Comment.objects.all().update(is_public=False)
+        t = Template(
+            "{% load comments %}"
+            "{% get_comment_count for a as cc %}"
+            "{% get_comment_counts for articles as counts %}"
+        )
+        articles = list(Article.objects.order_by("pk"))
+        ctx = Context({"a": articles[0], "articles": articles})
+        with self.assertNumQueries(2):
+            t.render(ctx)
+        self.assertEqual(ctx["cc"], 2)
+        self.assertEqual(ctx["counts"], {articles[0]: 2, articles[1]: 0})
+
+    @override_settings(COMMENTS_HIDE_REMOVED=False)
+    def testTemplateTagsIgnoreCountersWhenShowingRemoved(self):
+        c1, c2, c3, c4 = self.createSomeComments()
+        call_command("rebuild_comment_counters", verbosity=0)
+        perform_delete(self.request, c1)
+        t = Template("{% load comments %}{% get_comment_count for a as cc %}")
+        ctx = Context({"a": Article.objects.get(pk=1)})
+        t.render(ctx)
+        self.assertEqual(ctx["cc"], 2)
+
+
+class CommentCounterDisabledTests(CommentTestCase):
+
+    def testNotMaintained(self):
+        a = Article.objects.get(pk=1)
+        self.client.post("/post/", self.getValidData(a))
+        self.assertEqual(CommentCounter.objects.count(), 0)
+        self.assertEqual(Comment.objects.count_for_object(a), 1)
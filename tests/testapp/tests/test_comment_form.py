@@ -1,7 +1,10 @@
+import datetime
 import time
 
 from django.conf import settings
 from django.contrib.sites.models import Site
+from django.test.utils import override_settings
+from django.utils.crypto import salted_hmac
 
 from django_comments.forms import CommentForm
 from django_comments.models import Comment
@@ -53,6 +56,13 @@ class CommentFormTests(CommentTestCase):
     def testObjectPKTampering(self):
         self.tamperWithForm(object_pk="3")
 
+    def testSecurityHash(self):
+        f = CommentForm(Article.objects.get(pk=1))
+        expected = salted_hmac("django.contrib.forms.CommentSecurityForm", "testapp.article-1-1234").hexdigest()
+        self.assertEqual(f.generate_security_hash("testapp.article", "1", "1234"), expected)
+        with override_settings(SECRET_KEY="another secret"):
+            self.assertNotEqual(f.generate_security_hash("testapp.article", "1", "1234"), expected)
+
     def testSecurityErrors(self):
         f = self.tamperWithForm(honeypot="I am a robot")
         self.assertTrue("honeypot" in f.security_errors())
@@ -75,6 +85,24 @@ class CommentFormTests(CommentTestCase):
         c = f.get_comment_object(site_id=self.site_2.id)
         self.assertEqual(c.site_id, self.site_2.id)
 
+    def testCheckForDuplicateComment(self):
+        a = Article.objects.get(pk=1)
+        f = CommentForm(a, data=self.getValidData(a))
+        self.assertTrue(f.is_valid(), f.errors)
+        old = f.get_comment_object()
+        old.save()
+
+        new = Comment(**f.get_comment_create_data())
+        with self.assertNumQueries(1):
+            self.assertEqual(f.check_for_duplicate_comment(new), old)
+
+        # Comments posted on another day or with another text aren't duplicates.
+        new.submit_date += datetime.timedelta(days=1)
+        self.assertIsNone(f.check_for_duplicate_comment(new).pk)
+        new = Comment(**f.get_comment_create_data())
+        new.comment = "This is my other comment"
+        self.assertIsNone(f.check_for_duplicate_comment(new).pk)
+
     def testProfanities(self):
         """Test COMMENTS_ALLOW_PROFANITIES and PROFANITIES_LIST settings"""
         a = Article.objects.get(pk=1)
@@ -1,5 +1,6 @@
 from django.core import mail
-from django.test.utils import override_settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
 
 from django_comments.models import Comment
 from django_comments.moderation import (moderator, CommentModerator,
@@ -78,6 +79,20 @@ class CommentUtilsModeratorTests(CommentTestCase):
             self.createSomeComments()
             self.assertEqual(len(mail.outbox), 2)
 
+    def testNoExtraQueries(self):
+        """Moderation doesn't query the comment's content type or object"""
+        e = Entry.objects.get(pk=1)
+
+        def post(comment):
+            with CaptureQueriesContext(connection) as queries:
+                self.client.post("/post/", dict(self.getValidData(e), comment=comment))
+            return len(queries)
+
+        unmoderated = post("Unmoderated")
+        moderator.register(Entry, EntryModerator2)
+        self.assertEqual(post("Moderated"), unmoderated)
+        self.assertEqual(Comment.objects.count(), 2)
+
     def testCommentsEnabled(self):
         moderator.register(Entry, EntryModerator2)
         self.createSomeComments()
@@ -1,9 +1,15 @@
+from unittest import mock
+
 from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test.utils import override_settings
 
 from django_comments import signals
 from django_comments.abstracts import COMMENT_MAX_LENGTH
+from django_comments.forms import CommentForm
 from django_comments.models import Comment
+from django_comments.ratelimit import hit
 
 from . import CommentTestCase
 from testapp.models import Article, Book
@@ -100,6 +106,38 @@ class CommentViewTests(CommentTestCase):
         response = self.client.post("/post/", data)
         self.assertEqual(response.status_code, 400)
 
+    def testSecurityCheckedFirst(self):
+        """Forged or expired posts are rejected without a query"""
+        a = Article.objects.get(pk=1)
+        data = self.getValidData(a)
+        for forged in ({"security_hash": "Nobody expects the Spanish Inquisition!"},
+                       {"object_pk": "2"}, {"timestamp": "0"}, {"timestamp": "now"}):
+            with self.assertNumQueries(0):
+                response = self.client.post("/post/", dict(data, **forged))
+            self.assertEqual(response.status_code, 400)
+        self.assertEqual(Comment.objects.count(), 0)
+
+    def testSecurityCheckedLaterWithCustomCleaning(self):
+        """Forms cleaning the security data their own way are checked with the target"""
+        class LongTimeoutForm(CommentForm):
+            def __init__(self, target_object, **kwargs):
+                # Uses the target, so it can't be built without one.
+                self.headline = target_object.headline
+                super().__init__(target_object, **kwargs)
+
+            def clean_timestamp(self):
+                return self.cleaned_data["timestamp"]
+
+        a = Article.objects.get(pk=1)
+        data = self.getValidData(a)
+        data["timestamp"] = "1"
+        data["security_hash"] = CommentForm(a).generate_security_hash(
+            data["content_type"], data["object_pk"], data["timestamp"])
+        with mock.patch("django_comments.get_form", return_value=LongTimeoutForm):
+            response = self.client.post("/post/", data)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Comment.objects.count(), 1)
+
     def testDebugCommentErrors(self):
         """The debug error template should be shown only if DEBUG is True"""
         olddebug = settings.DEBUG
@@ -359,3 +397,52 @@ class CommentViewTests(CommentTestCase):
             '/somewhere/else/?c=%s#baz' % Comment.objects.latest('id').pk,
             fetch_redirect_response=False,
         )
+
+
+@override_settings(COMMENTS_RATE_LIMITS={'default': (2, 60), 'testapp.book': None})
+class RateLimitTests(CommentTestCase):
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def post(self, obj, comment, **extra):
+        data = dict(self.getValidData(obj), comment=comment, **extra)
+        return self.client.post("/post/", data, REMOTE_ADDR="1.2.3.4")
+
+    def testRateLimit(self):
+        a = Article.objects.get(pk=1)
+        self.assertEqual(self.post(a, "One").status_code, 302)
+        self.assertEqual(self.post(a, "Two").status_code, 302)
+        # Previews aren't counted.
+        self.assertEqual(self.post(a, "Preview", preview="Preview").status_code, 200)
+        with self.assertLogs('django.request', 'WARNING'):
+            response = self.post(a, "Three")
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '60')
+        self.assertEqual(Comment.objects.count(), 2)
+
+        # Other IP addresses and users have their own limit.
+        data = dict(self.getValidData(a), comment="Four")
+        self.assertEqual(self.client.post("/post/", data, REMOTE_ADDR="1.2.3.5").status_code, 302)
+        self.client.force_login(self.user)
+        self.assertEqual(self.post(a, "Five").status_code, 302)
+
+    def testUnlimitedContentType(self):
+        b = Book.objects.first()
+        for i in range(3):
+            self.assertEqual(self.post(b, "Comment %d" % i).status_code, 302)
+
+    def testSlidingWindow(self):
+        with mock.patch('django_comments.ratelimit.time.time', return_value=600.0):
+            self.assertFalse(hit('test', 2, 60))
+            self.assertFalse(hit('test', 2, 60))
+            self.assertTrue(hit('test', 2, 60))
+        # Halfway through the next window, half of the previous hits count.
+        with mock.patch('django_comments.ratelimit.time.time', return_value=690.0):
+            self.assertTrue(hit('test', 2, 60))
+        with mock.patch('django_comments.ratelimit.time.time', return_value=719.0):
+            self.assertTrue(hit('test', 2, 60))
+        # Two windows later, the first hits are forgotten.
+        with mock.patch('django_comments.ratelimit.time.time', return_value=780.0):
+            self.assertFalse(hit('test', 2, 60))
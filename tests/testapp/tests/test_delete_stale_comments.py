@@ -1,9 +1,17 @@
+import multiprocessing
+from io import StringIO
+from unittest import mock, skipUnless
+
+import django
+
 from django.core.management import call_command
+from django.core.management.base import CommandError
 
+from django_comments.management.commands import delete_stale_comments
 from django_comments.models import Comment
 
 from . import CommentTestCase
-from testapp.models import Article
+from testapp.models import Article, Author
 
 
 class CommentManagerTests(CommentTestCase):
@@ -30,3 +38,84 @@ class CommentManagerTests(CommentTestCase):
 
         self.assertEqual(0, Comment.objects.for_model(Article).count())
         self.assertEqual(initial_count - article_comments_count, Comment.objects.count())
+
+    def testBatches(self):
+        self.createSomeComments()
+        article_pks = list(Article.objects.values_list('pk', flat=True))
+        Article.objects.filter(pk=article_pks[0]).delete()
+        stale_count = Comment.objects.for_model(Article).filter(object_pk=article_pks[0]).count()
+        self.assertGreater(stale_count, 0)
+        initial_count = Comment.objects.count()
+
+        out = StringIO()
+        call_command("delete_stale_comments", "--yes", "--batch-size", "1", verbosity=2, stdout=out)
+
+        self.assertEqual(initial_count - stale_count, Comment.objects.count())
+        self.assertIn("Deleted %d stale comments" % stale_count, out.getvalue())
+
+    def testInvalidObjectPk(self):
+        self.createSomeComments()
+        Comment.objects.for_model(Article).update(object_pk='invalid')
+
+        call_command("delete_stale_comments", "--yes", verbosity=0)
+
+        self.assertEqual(0, Comment.objects.for_model(Article).count())
+
+    def testContentType(self):
+        self.createSomeComments()
+        Article.objects.all().delete()
+        Author.objects.all().delete()
+        author_comments_count = Comment.objects.for_model(Author).count()
+        self.assertGreater(author_comments_count, 0)
+
+        call_command("delete_stale_comments", "--yes", "--content-type", "testapp.article", verbosity=0)
+
+        self.assertEqual(0, Comment.objects.for_model(Article).count())
+        self.assertEqual(author_comments_count, Comment.objects.for_model(Author).count())
+
+    def testUnknownContentType(self):
+        with self.assertRaises(CommandError):
+            call_command("delete_stale_comments", "--yes", "--content-type", "testapp.unknown", verbosity=0)
+        with self.assertRaises(CommandError):
+            call_command("delete_stale_comments", "--yes", "--content-type", "article", verbosity=0)
+
+    def testDryRun(self):
+        self.createSomeComments()
+        initial_count = Comment.objects.count()
+        article_comments_count = Comment.objects.for_model(Article).count()
+        Article.objects.all().delete()
+
+        out = StringIO()
+        call_command("delete_stale_comments", "--dry-run", stdout=out)
+
+        self.assertEqual(initial_count, Comment.objects.count())
+        self.assertIn("Found %d stale comments" % article_comments_count, out.getvalue())
+
+    def testWorkersRequireConfirmation(self):
+        with self.assertRaises(CommandError):
+            call_command("delete_stale_comments", "--workers", "2")
+        with self.assertRaises(CommandError):
+            call_command("delete_stale_comments", "--yes", "--workers", "0", verbosity=0)
+
+    @skipUnless(multiprocessing.get_start_method() == 'fork',
+                "Workers only see the in-memory test database when forked.")
+    def testWorkers(self):
+        self.createSomeComments()
+        article_comments_count = Comment.objects.for_model(Article).count()
+        Article.objects.all().delete()
+
+        out = StringIO()
+        call_command("delete_stale_comments", "--dry-run", "--workers", "2", stdout=out)
+
+        output = out.getvalue()
+        self.assertIn("Checking comments on `testapp.article'", output)
+        self.assertIn("Checking comments on `testapp.author'", output)
+        self.assertIn("Found %d stale comments" % article_comments_count, output)
+
+    def testWorkersSetUpDjango(self):
+        # Workers that aren't forked (spawn, forkserver) must set up Django.
+        self.createSomeComments()
+        with mock.patch.object(delete_stale_comments, "ProcessPoolExecutor") as executor_mock:
+            executor_mock.return_value.__enter__.return_value.map.return_value = [(0, ""), (0, "")]
+            call_command("delete_stale_comments", "--dry-run", "--workers", "2", stdout=StringIO())
+        executor_mock.assert_called_once_with(max_workers=2, initializer=django.setup)
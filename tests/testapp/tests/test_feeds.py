@@ -1,6 +1,7 @@
 from xml.etree import ElementTree as ET
 
 from django.conf import settings
+from django.contrib.auth.models import User
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.sites.models import Site
 from django.test.utils import override_settings
@@ -51,3 +52,19 @@ class CommentFeedTests(CommentTestCase):
         self.assertEqual(atomlink_elem.attrib, {"href": "http://example.com/rss/comments/", "rel": "self"})
 
         self.assertNotContains(response, "A comment for the second site.")
+
+    def test_feed_query_count(self):
+        self.createSomeComments()
+        # Rendering the feed doesn't need a query per comment.
+        with self.assertNumQueries(1):
+            self.client.get(self.feed_url)
+        for i in range(3):
+            Comment.objects.create(
+                content_type=ContentType.objects.get_for_model(Article),
+                object_pk="1",
+                user=User.objects.create(username="user%d" % i, first_name="User"),
+                comment="Comment %d" % i,
+                site=Site.objects.get_current(),
+            )
+        with self.assertNumQueries(1):
+            self.client.get(self.feed_url)
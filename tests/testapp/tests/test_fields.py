@@ -0,0 +1,50 @@
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.sites.models import Site
+
+from django_comments.fields import prefetch_comments
+from django_comments.models import Comment
+
+from . import CommentTestCase
+from testapp.models import Entry
+
+
+class CommentsRelationTests(CommentTestCase):
+    fixtures = ["comment_utils.xml"]
+
+    def createEntryComments(self):
+        e1, e2 = Entry.objects.order_by("pk")
+        ct = ContentType.objects.get_for_model(Entry)
+        site = Site.objects.get_current()
+        c1 = Comment.objects.create(
+            content_type=ct, object_pk=e1.pk, site=site, user=self.user, comment="First")
+        c2 = Comment.objects.create(
+            content_type=ct, object_pk=e1.pk, site=site, user_name="Joe", comment="Hidden", is_public=False)
+        c3 = Comment.objects.create(
+            content_type=ct, object_pk=e2.pk, site=site, user_name="Joe", comment="Second")
+        c4 = Comment.objects.create(
+            content_type=ct, object_pk=e1.pk, site=site, user_name="Joe", comment="Third")
+        return c1, c2, c3, c4
+
+    def testRelation(self):
+        c1, c2, c3, c4 = self.createEntryComments()
+        e1 = Entry.objects.get(pk=1)
+        self.assertEqual(list(e1.comments.order_by("pk")), [c1, c2, c4])
+        self.assertEqual(list(Entry.objects.filter(comments__comment="Second")), [c3.content_object])
+
+    def testPrefetchComments(self):
+        c1, c2, c3, c4 = self.createEntryComments()
+        with self.assertNumQueries(2):
+            entries = list(Entry.objects.order_by("pk").prefetch_related(prefetch_comments()))
+            self.assertEqual(list(entries[0].comments.all()), [c1, c4])
+            self.assertEqual(list(entries[1].comments.all()), [c3])
+            self.assertEqual(entries[0].comments.all()[0].name, "Joe Normal")
+
+    def testPrefetchCommentsToAttr(self):
+        c1, c2, c3, c4 = self.createEntryComments()
+        entries = Entry.objects.order_by("pk").prefetch_related(prefetch_comments(to_attr="visible_comments"))
+        self.assertEqual([e.visible_comments for e in entries], [[c1, c4], [c3]])
+
+    def testDeleteCascades(self):
+        self.createEntryComments()
+        Entry.objects.get(pk=1).delete()
+        self.assertEqual(list(Comment.objects.values_list("comment", flat=True)), ["Second"])
@@ -1,3 +1,8 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import override_settings
+
+from django_comments.abstracts import get_comment_hash
 from django_comments.models import Comment
 
 from . import CommentTestCase
@@ -9,6 +14,24 @@ class CommentModelTests(CommentTestCase):
         for c in self.createSomeComments():
             self.assertNotEqual(c.submit_date, None)
 
+    def testVisibleCommentsIndex(self):
+        # Created by a migration, where partial indexes are supported.
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, Comment._meta.db_table)
+        self.assertEqual(
+            "django_comm_visible_idx" in constraints, connection.features.supports_partial_indexes)
+
+    def testCommentHash(self):
+        c1, c2, c3, c4 = self.createSomeComments()
+        self.assertEqual(c1.comment_hash, get_comment_hash(c1.comment))
+        self.assertEqual(get_comment_hash("Spam  SPAM\nspam "), get_comment_hash("spam spam spam"))
+        self.assertNotEqual(get_comment_hash("spam"), get_comment_hash("eggs"))
+
+        c1.comment = "Edited"
+        c1.save(update_fields=['comment'])
+        c1.refresh_from_db()
+        self.assertEqual(c1.comment_hash, get_comment_hash("Edited"))
+
     def testUserProperties(self):
         c1, c2, c3, c4 = self.createSomeComments()
         self.assertEqual(c1.name, "Joe Somebody")
@@ -49,6 +72,73 @@ class CommentManagerTests(CommentTestCase):
         self.assertEqual(article_comments, [c1, c3])
         self.assertEqual(author_comments, [c2])
 
+    def testWithText(self):
+        c1, c2, c3, c4 = self.createSomeComments()
+        c2.comment = c1.comment.upper()
+        c2.save()
+        self.assertEqual(list(Comment.objects.with_text(c1.comment).order_by("id")), [c1, c2])
+        self.assertEqual(list(Comment.objects.with_text("Not posted")), [])
+
+    def testWithRelatedQueryCount(self):
+        self.createSomeComments()
+        with self.assertNumQueries(1):
+            for c in Comment.objects.with_related():
+                str(c)
+                c.email
+                c.get_as_text()
+
+    def testRows(self):
+        c1, c2, c3, c4 = self.createSomeComments()
+        # A user without a full name, whose comment has a user_name, and a
+        # user with neither.
+        user = User.objects.create(username="jane", email="")
+        c5 = Comment.objects.create(content_object=c1.content_object, site_id=1, user=user,
+                                    user_name="Jane D.", user_email="jane@example.com", comment="Hi")
+        c6 = Comment.objects.create(content_object=c1.content_object, site_id=1, user=user, comment="Hi")
+        with self.assertNumQueries(1):
+            rows = Comment.objects.rows(Comment.objects.order_by("id"))
+        for comment, row in zip([c1, c2, c3, c4, c5, c6], rows):
+            comment = Comment.objects.get(pk=comment.pk)
+            self.assertEqual(row.pk, comment.pk)
+            self.assertEqual(row.id, comment.id)
+            self.assertEqual(row.userinfo, comment.userinfo)
+            self.assertEqual(row.submit_date, comment.submit_date)
+            self.assertEqual(row.get_absolute_url(), comment.get_absolute_url())
+            self.assertEqual(row.get_absolute_url("#c%(id)s-%(name)s"), "%s#c%s-%s" % (
+                comment.get_content_object_url(), comment.pk, comment.name))
+        self.assertEqual([row.name for row in rows[4:]], ["Jane D.", "jane"])
+        self.assertEqual(len(Comment.objects.rows()), 6)
+        with self.assertRaises(AttributeError):
+            rows[0].ip_address = "1.2.3.4"
+
+    def testVisible(self):
+        c1, c2, c3, c4 = self.createSomeComments()
+        c1.is_public = False
+        c1.save()
+        c2.is_removed = True
+        c2.save()
+        self.assertEqual(list(Comment.objects.visible().order_by("id")), [c3, c4])
+        with override_settings(COMMENTS_HIDE_REMOVED=False):
+            self.assertEqual(list(Comment.objects.visible().order_by("id")), [c2, c3, c4])
+        self.assertEqual(list(Comment.objects.visible(site_id=2)), [])
+
+    def testForObjects(self):
+        c1, c2, c3, c4 = self.createSomeComments()
+        objects = [
+            Article.objects.get(pk=1),
+            Article.objects.get(pk=2),
+            Author.objects.get(pk=1),
+            Author.objects.get(pk=2),
+        ]
+        # One query per content type.
+        with self.assertNumQueries(2):
+            comments = Comment.objects.for_objects(objects)
+            self.assertEqual(list(comments), objects)
+            self.assertEqual(list(comments.values()), [[c1, c3], [], [c2], [c4]])
+            # Neither the content object nor the user need another query.
+            self.assertEqual([c.content_object for c in comments[objects[0]]], [objects[0]] * 2)
+            self.assertEqual(comments[objects[3]][0].name, "Frank Nobody")
+
     def testPrefetchRelated(self):
         c1, c2, c3, c4 = self.createSomeComments()
         # one for comments, one for Articles, one for Author
@@ -0,0 +1,134 @@
+import datetime
+
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from django_comments.models import Comment
+from django_comments.moderation import (moderator, CommentModerator,
+    ModerationRule, AccountAgeRule, BlocklistRule, CloseAfterRule,
+    LinkCountRule, RateLimitRule)
+
+from . import CommentTestCase
+from testapp.models import Entry
+
+
+class RecordingRule(ModerationRule):
+    def __init__(self, name, result, calls, **kwargs):
+        super().__init__(**kwargs)
+        self.name = name
+        self.result = result
+        self.calls = calls
+
+    def __str__(self):
+        return self.name
+
+    def matches(self, comment, content_object, request):
+        self.calls.append(self.name)
+        return self.result
+
+
+class ModerationRuleTests(CommentTestCase):
+    fixtures = ["comment_utils.xml"]
+
+    def setUp(self):
+        super().setUp()
+        self.entry = Entry.objects.get(pk=1)
+
+    def tearDown(self):
+        if Entry in moderator._registry:
+            moderator.unregister(Entry)
+
+    def getModerator(self, *rules):
+        return type('EntryModerator', (CommentModerator,), {'rules': list(rules)})(Entry)
+
+    def getComment(self, **kwargs):
+        return Comment(**dict({
+            'content_object': self.entry,
+            'site_id': 1,
+            'user_name': 'Jim Bob',
+            'comment': 'This is my comment',
+            'ip_address': '1.2.3.4',
+        }, **kwargs))
+
+    def post(self, comment="This is my comment"):
+        self.client.post("/post/", dict(self.getValidData(self.entry), comment=comment), REMOTE_ADDR="1.2.3.4")
+
+    def testCheapestFirst(self):
+        calls = []
+        m = self.getModerator(
+            RecordingRule('expensive', True, calls, action=ModerationRule.REJECT, cost=10),
+            RecordingRule('cheap', True, calls, action=ModerationRule.REJECT, cost=1),
+            RecordingRule('moderate', True, calls),
+        )
+        with self.assertLogs('django_comments.moderation', 'DEBUG') as logs:
+            self.assertFalse(m.allow(self.getComment(), self.entry, None))
+        # The first matching rule short-circuits the others.
+        self.assertEqual(calls, ['cheap'])
+        self.assertEqual(len(logs.records), 1)
+        self.assertIn("cheap matched", logs.output[0])
+        self.assertEqual(logs.records[0].rule.name, 'cheap')
+
+        calls.clear()
+        self.assertTrue(m.moderate(self.getComment(), self.entry, None))
+        self.assertEqual(calls, ['moderate'])
+
+    def testNoMatch(self):
+        calls = []
+        m = self.getModerator(
+            RecordingRule('second', False, calls, action=ModerationRule.REJECT, cost=2),
+            RecordingRule('first', False, calls, action=ModerationRule.REJECT, cost=1),
+        )
+        self.assertTrue(m.allow(self.getComment(), self.entry, None))
+        self.assertFalse(m.moderate(self.getComment(), self.entry, None))
+        self.assertEqual(calls, ['first', 'second'])
+
+    def testInvalidAction(self):
+        with self.assertRaises(ValueError):
+            LinkCountRule(1, action='delete')
+
+    def testLinkCountRule(self):
+        rule = LinkCountRule(1)
+        self.assertFalse(rule.matches(self.getComment(comment="See http://example.com"), self.entry, None))
+        self.assertTrue(rule.matches(
+            self.getComment(comment="See HTTPS://example.com and www.example.org"), self.entry, None))
+
+    def testAccountAgeRule(self):
+        rule = AccountAgeRule(datetime.timedelta(days=1))
+        old = User.objects.create(username="old", date_joined=timezone.now() - datetime.timedelta(days=2))
+        new = User.objects.create(username="new")
+        self.assertFalse(rule.matches(self.getComment(user=old), self.entry, None))
+        self.assertTrue(rule.matches(self.getComment(user=new), self.entry, None))
+        self.assertTrue(rule.matches(self.getComment(), self.entry, None))
+        self.assertFalse(AccountAgeRule(datetime.timedelta(days=1), anonymous=False).matches(
+            self.getComment(), self.entry, None))
+
+    def testCloseAfterRule(self):
+        self.assertTrue(CloseAfterRule('pub_date', 7).matches(self.getComment(), self.entry, None))
+        self.entry.pub_date = timezone.now().date()
+        self.assertFalse(CloseAfterRule('pub_date', 7).matches(self.getComment(), self.entry, None))
+
+    def testBlocklistRule(self):
+        rule = BlocklistRule(["casino"])
+        self.assertFalse(rule.matches(self.getComment(), self.entry, None))
+        self.assertTrue(rule.matches(self.getComment(comment="Best CASINO online"), self.entry, None))
+        self.assertTrue(rule.matches(self.getComment(user_url="http://casino.example.com"), self.entry, None))
+
+    def testRateLimitRule(self):
+        moderator.register(Entry, type('EntryModerator', (CommentModerator,), {
+            'rules': [RateLimitRule(2, datetime.timedelta(minutes=1))],
+        }))
+        self.post("One")
+        self.post("Two")
+        with self.assertLogs('django.request', 'WARNING'):
+            self.post("Three")
+        self.assertEqual(
+            list(Comment.objects.order_by('pk').values_list('comment', flat=True)), ["One", "Two"])
+
+    def testModerateRule(self):
+        moderator.register(Entry, type('EntryModerator', (CommentModerator,), {
+            'rules': [LinkCountRule(0)],
+        }))
+        self.post("Visit http://example.com")
+        self.post("Hello")
+        self.assertEqual(
+            list(Comment.objects.order_by('pk').values_list('is_public', flat=True)), [False, True])
@@ -1,10 +1,15 @@
 from django.contrib.auth.models import User, Permission
 from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.core.management import call_command
+from django.template import Context, Template
+from django.test.client import RequestFactory
 from django.test.utils import override_settings
 from django.utils import translation
 
 from django_comments import signals
 from django_comments.models import Comment, CommentFlag
+from django_comments.views.moderation import perform_bulk_approve, perform_bulk_delete, perform_bulk_flag
 
 from . import CommentTestCase
 
@@ -345,3 +350,89 @@ class AdminActionsTests(CommentTestCase):
                 '1 comment was successfully removed.')
             self.performActionAndCheckMessage('remove_comments', many_comments,
                 '3 comments were successfully removed.')
+
+    def testActionsBulk(self):
+        c1, c2, c3, c4 = self.createSomeComments()
+        makeModerator("normaluser")
+        self.client.force_login(self.user)
+        received = []
+
+        def receive(sender, **kwargs):
+            received.append(kwargs)
+
+        signals.comments_were_flagged.connect(receive)
+        try:
+            self.client.post('/admin/django_comments/comment/', data={
+                '_selected_action': [c1.pk, c2.pk, c3.pk],
+                'action': 'remove_comments',
+                'index': 0,
+            })
+        finally:
+            signals.comments_were_flagged.disconnect(receive)
+
+        self.assertEqual(len(received), 1)
+        self.assertEqual(sorted(received[0]['comment_ids']), [c1.pk, c2.pk, c3.pk])
+        self.assertEqual(received[0]['flag'], CommentFlag.MODERATOR_DELETION)
+        self.assertEqual(received[0]['request'].user, self.user)
+        self.assertEqual(
+            list(Comment.objects.filter(is_removed=True).order_by('pk')), [c1, c2, c3])
+        self.assertEqual(CommentFlag.objects.filter(flag=CommentFlag.MODERATOR_DELETION).count(), 3)
+
+
+class BulkModerationTests(CommentTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.request = RequestFactory().post("/")
+        self.request.user = self.user
+
+    def testBulkFlag(self):
+        self.createSomeComments()
+        # Select the ids, insert the flags (in a savepoint) and find the
+        # objects whose cached comment lists are invalidated.
+        with self.assertNumQueries(5):
+            n = perform_bulk_flag(self.request, Comment.objects.all())
+        self.assertEqual(n, 4)
+        self.assertEqual(CommentFlag.objects.filter(flag=CommentFlag.SUGGEST_REMOVAL, user=self.user).count(), 4)
+        # Flagging again doesn't create duplicate flags.
+        perform_bulk_flag(self.request, Comment.objects.all())
+        self.assertEqual(CommentFlag.objects.count(), 4)
+
+    def testBulkDeleteAndApprove(self):
+        c1, c2, c3, c4 = self.createSomeComments()
+        Comment.objects.filter(pk=c2.pk).update(is_public=False)
+        perform_bulk_delete(self.request, Comment.objects.filter(pk__in=[c1.pk, c2.pk]))
+        self.assertEqual(
+            list(Comment.objects.values_list('is_public', 'is_removed').order_by('pk')),
+            [(True, True), (False, True), (True, False), (True, False)])
+        perform_bulk_approve(self.request, Comment.objects.all())
+        self.assertEqual(Comment.objects.filter(is_public=True, is_removed=False).count(), 4)
+        self.assertEqual(CommentFlag.objects.filter(flag=CommentFlag.MODERATOR_APPROVAL).count(), 4)
+
+    def testBulkEmptyQueryset(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(perform_bulk_flag(self.request, Comment.objects.filter(pk=0)), 0)
+
+    @override_settings(COMMENTS_USE_COUNTERS=True)
+    def testBulkUpdatesCounters(self):
+        c1, c2, c3, c4 = self.createSomeComments()
+        call_command("rebuild_comment_counters", verbosity=0)
+        Comment.objects.filter(pk=c1.pk).update(is_public=False)
+        call_command("rebuild_comment_counters", verbosity=0)
+        article = c1.content_object
+        self.assertEqual(Comment.objects.count_for_object(article), 1)
+        perform_bulk_approve(self.request, Comment.objects.all())
+        self.assertEqual(Comment.objects.count_for_object(article), 2)
+        perform_bulk_delete(self.request, Comment.objects.filter(pk__in=[c1.pk, c2.pk]))
+        perform_bulk_delete(self.request, Comment.objects.filter(pk__in=[c1.pk, c2.pk]))
+        self.assertEqual(Comment.objects.count_for_object(article), 1)
+        self.assertEqual(Comment.objects.count_for_object(c2.content_object), 0)
+
+    def testBulkInvalidatesCachedLists(self):
+        cache.clear()
+        c1, c2, c3, c4 = self.createSomeComments()
+        t = Template("{% load comments %}{% render_comment_list for a cache %}")
+        ctx = Context({"a": c1.content_object})
+        self.assertIn("First!", t.render(ctx))
+        perform_bulk_delete(self.request, Comment.objects.filter(pk=c1.pk))
+        self.assertNotIn("First!", t.render(ctx))
@@ -0,0 +1,88 @@
+from io import StringIO
+
+from django.core import mail
+from django.core.management import call_command
+from django.test.utils import override_settings
+
+from django_comments.models import CommentNotification
+from django_comments.moderation import moderator, CommentModerator
+from django_comments.notifications import QueueBackend
+
+from . import CommentTestCase
+from testapp.models import Entry
+
+
+class EntryModerator(CommentModerator):
+    email_notification = True
+
+
+@override_settings(
+    COMMENTS_NOTIFICATION_BACKEND='django_comments.notifications.QueueBackend',
+    MANAGERS=[("Manager", "manager@example.com")],
+)
+class QueuedNotificationTests(CommentTestCase):
+    fixtures = ["comment_utils.xml"]
+
+    def setUp(self):
+        super().setUp()
+        moderator.register(Entry, EntryModerator)
+
+    def tearDown(self):
+        moderator.unregister(Entry)
+
+    def postComments(self, *texts):
+        e = Entry.objects.get(pk=1)
+        for text in texts:
+            self.client.post("/post/", dict(self.getValidData(e), comment=text))
+
+    def testQueued(self):
+        self.postComments("First comment", "Second comment")
+        self.assertEqual(len(mail.outbox), 0)
+        notifications = list(CommentNotification.objects.order_by('pk'))
+        self.assertEqual(len(notifications), 2)
+        self.assertEqual(notifications[0].recipient_list, ["manager@example.com"])
+        self.assertIn("First comment", notifications[0].message)
+
+    def testSend(self):
+        self.postComments("First comment", "Second comment", "Third comment")
+
+        out = StringIO()
+        call_command("send_comment_notifications", "--batch-size", "2", stdout=out)
+
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertIn("First comment", mail.outbox[0].body)
+        self.assertEqual(mail.outbox[0].to, ["manager@example.com"])
+        self.assertEqual(CommentNotification.objects.count(), 0)
+        self.assertIn("Sent 3 notifications in 3 emails", out.getvalue())
+
+    def testSendDigest(self):
+        self.postComments("First comment", "Second comment")
+        QueueBackend().send("Subject", "Message", "from@example.com", ["other@example.com"])
+
+        out = StringIO()
+        call_command("send_comment_notifications", "--digest", stdout=out)
+
+        self.assertEqual(len(mail.outbox), 2)
+        digest, single = mail.outbox
+        self.assertEqual(digest.subject, "[example.com] 2 new comments posted")
+        self.assertIn("First comment", digest.body)
+        self.assertIn("Second comment", digest.body)
+        self.assertEqual(single.subject, "Subject")
+        self.assertEqual(single.to, ["other@example.com"])
+        self.assertIn("Sent 3 notifications in 2 emails", out.getvalue())
+
+    def testSendFailure(self):
+        self.postComments("First comment")
+        with override_settings(EMAIL_BACKEND='testapp.tests.test_notifications.BrokenEmailBackend'):
+            with self.assertRaises(OSError):
+                call_command("send_comment_notifications", verbosity=0)
+        # Notifications stay queued until they are sent.
+        self.assertEqual(CommentNotification.objects.count(), 1)
+
+
+class BrokenEmailBackend:
+    def __init__(self, **kwargs):
+        pass
+
+    def send_messages(self, messages):
+        raise OSError("Connection refused")
@@ -0,0 +1,35 @@
+from django.test import SimpleTestCase
+from django.test.utils import override_settings
+
+from django_comments.profanities import ProfanityMatcher, get_profanity_matcher
+
+
+class ProfanityMatcherTests(SimpleTestCase):
+
+    def testFind(self):
+        matcher = ProfanityMatcher(["rooster", "roost", "hen"])
+        self.assertEqual(matcher.find("What a ROOSTER!"), ["rooster", "roost"])
+        self.assertEqual(matcher.find("Whenever"), ["hen"])
+        self.assertEqual(matcher.find("A cow"), [])
+
+    def testWholeWords(self):
+        matcher = ProfanityMatcher(["rooster", "roost", "hen"], whole_words=True)
+        self.assertEqual(matcher.find("What a ROOSTER!"), ["rooster"])
+        self.assertEqual(matcher.find("Whenever"), [])
+        self.assertEqual(matcher.find("The hen and the roost."), ["roost", "hen"])
+
+    def testSpecialCharacters(self):
+        matcher = ProfanityMatcher(["c.w", "", "(hen"])
+        self.assertEqual(matcher.find("cow"), [])
+        self.assertEqual(matcher.find("c.w (hen"), ["c.w", "(hen"])
+        self.assertEqual(ProfanityMatcher([]).find("cow"), [])
+
+    def testCachedPerSetting(self):
+        with override_settings(PROFANITIES_LIST=["rooster"]):
+            matcher = get_profanity_matcher()
+            self.assertIs(get_profanity_matcher(), matcher)
+            self.assertEqual(matcher.find("rooster"), ["rooster"])
+        with override_settings(PROFANITIES_LIST=["hen"]):
+            self.assertEqual(get_profanity_matcher().find("rooster hen"), ["hen"])
+        with override_settings(PROFANITIES_LIST=["hen"], COMMENTS_PROFANITIES_WHOLE_WORDS=True):
+            self.assertEqual(get_profanity_matcher().find("whenever"), [])
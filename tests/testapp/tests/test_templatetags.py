@@ -1,13 +1,25 @@
+import datetime
+import functools
+import re
+from unittest import mock
+
 from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.sites.models import Site
-from django.template import Template, Context
+from django.core.cache import cache
+from django.template import Template, Context, TemplateSyntaxError
+from django.template.loader import render_to_string
 from django.test.client import RequestFactory
 from django.test.utils import override_settings
+from django.utils import timezone
+from django.utils import translation
+from django.utils.http import urlsafe_base64_encode
 
 from django_comments.forms import CommentForm
 from django_comments.models import Comment
+from django_comments.templatetags.comments import encode_cursor
 
+from custom_comments.forms import CustomCommentForm
 from testapp.models import Article, Author
 from . import CommentTestCase
 
@@ -62,6 +74,56 @@ class CommentTemplateTagTests(CommentTestCase):
         with self.assertNumQueries(1):
             self.testRenderCommentFormFromObject()
 
+    def testRenderCommentFormCache(self):
+        cache.clear()
+        articles = list(Article.objects.order_by('pk'))
+        t = "{% load comments %}{% for a in articles %}{% render_comment_form for a cache %}{% endfor %}"
+        with mock.patch('django_comments.templatetags.comments.render_to_string',
+                        wraps=render_to_string) as render_mock:
+            ctx, out = self.render(t, articles=articles, next="/done/")
+        # The form is rendered once for all the articles.
+        self.assertEqual(render_mock.call_count, 1)
+        self.assertNotIn("placeholder", out)
+        forms = out.split("</form>")[:-1]
+        self.assertEqual(len(forms), len(articles))
+        for article, form in zip(articles, forms):
+            data = dict(re.findall(r'name="(\w+)" value="([^"]*)"', form))
+            self.assertEqual(data["content_type"], "testapp.article")
+            self.assertEqual(data["object_pk"], str(article.pk))
+            self.assertEqual(data["next"], "/done/")
+            self.assertTrue(CommentForm.verify_security_data(data))
+
+        # Later renders read the form from the cache.
+        with mock.patch('django_comments.templatetags.comments.render_to_string') as render_mock:
+            self.render(t, articles=articles, next="/done/")
+        render_mock.assert_not_called()
+
+        # The output matches the uncached form, but for the timestamp and hash.
+        ctx, uncached = self.render("{% load comments %}{% render_comment_form for a %}",
+                                    a=articles[0], next="/done/")
+        strip_values = functools.partial(re.sub, r'value="[0-9a-f]+"', 'value=""')
+        self.assertEqual(strip_values(forms[0] + "</form>"), strip_values(uncached).rstrip())
+
+    def testRenderCommentFormCacheCustomForm(self):
+        # Forms without the standard security fields are rendered uncached.
+        cache.clear()
+        with mock.patch("django_comments.get_form", return_value=CustomCommentForm):
+            ctx, out = self.render("{% load comments %}{% render_comment_form for a cache %}",
+                                   a=Article.objects.get(pk=1))
+        self.assertTrue(out.strip().startswith("<form action="))
+        self.assertNotIn("placeholder", out)
+
+    def testRenderCommentFormCacheCsrfToken(self):
+        cache.clear()
+        a = Article.objects.get(pk=1)
+        t = "{% load comments %}{% render_comment_form for a cache %}"
+        ctx, out = self.render(t, a=a, csrf_token="token<1>")
+        self.assertIn('name="csrfmiddlewaretoken" value="token&lt;1&gt;"', out)
+        ctx, out = self.render(t, a=a, csrf_token="token2")
+        self.assertIn('name="csrfmiddlewaretoken" value="token2"', out)
+        ctx, out = self.render(t, a=a)
+        self.assertNotIn("csrfmiddlewaretoken", out)
+
     def verifyGetCommentCount(self, tag=None):
         t = "{% load comments %}" + (tag or "{% get_comment_count for testapp.article a.id as cc %}") + "{{ cc }}"
         ctx, out = self.render(t, a=Article.objects.get(pk=1))
@@ -83,6 +145,60 @@ class CommentTemplateTagTests(CommentTestCase):
         self.createSomeComments()
         self.verifyGetCommentCount("{% load comment_testtags %}{% get_comment_count for a|noop:'x y' as cc %}")
 
+    def testGetCommentCounts(self):
+        self.createSomeComments()
+        t = "{% load comments %}{% get_comment_counts for articles as counts %}"
+        articles = list(Article.objects.order_by("pk"))
+        with self.assertNumQueries(1):
+            ctx, out = self.render(t, articles=articles)
+        self.assertEqual(out, "")
+        self.assertEqual(ctx["counts"], {articles[0]: 2, articles[1]: 0})
+
+    def testGetCommentCountsMixedModels(self):
+        self.createSomeComments()
+        t = "{% load comments %}{% get_comment_counts for objects as counts %}"
+        # Objects of different models with the same primary key are counted
+        # separately.
+        article, author = Article.objects.get(pk=1), Author.objects.get(pk=1)
+        with self.assertNumQueries(2):
+            ctx, out = self.render(t, objects=[article, author])
+        self.assertEqual(ctx["counts"], {article: 2, author: 1})
+
+    def testGetCommentCountsSkipsUnsaved(self):
+        self.createSomeComments()
+        t = "{% load comments %}{% get_comment_counts for objects as counts %}"
+        article = Article.objects.get(pk=1)
+        ctx, out = self.render(t, objects=[article, Article(headline="Draft")])
+        self.assertEqual(ctx["counts"], {article: 2})
+
+    def testGetCommentCountsHidesNonPublic(self):
+        c1, c2, c3, c4 = self.createSomeComments()
+        c1.is_public = False
+        c1.save()
+        c3.is_removed = True
+        c3.save()
+        t = "{% load comments %}{% get_comment_counts for articles as counts %}"
+        articles = list(Article.objects.order_by("pk"))
+        ctx, out = self.render(t, articles=articles)
+        self.assertEqual(ctx["counts"], {articles[0]: 0, articles[1]: 0})
+
+    def testGetCommentCountsMissingVariable(self):
+        t = "{% load comments %}{% get_comment_counts for missing as counts %}"
+        ctx, out = self.render(t)
+        self.assertEqual(ctx["counts"], {})
+
+    def testGetCommentLists(self):
+        c1, c2, c3, c4 = self.createSomeComments()
+        c3.is_public = False
+        c3.save()
+        t = "{% load comments %}{% get_comment_lists for articles as comment_map %}"
+        t += "{% for article, comments in comment_map.items %}{{ article.pk }}:{{ comments|length }} {% endfor %}"
+        articles = list(Article.objects.all())
+        with self.assertNumQueries(1):
+            ctx, out = self.render(t, articles=articles)
+        self.assertEqual(out, "1:1 2:0 ")
+        self.assertEqual(ctx["comment_map"][articles[0]], [c1])
+
     def verifyGetCommentList(self, tag=None):
         c1, c2, c3, c4 = Comment.objects.all()[:4]
         t = "{% load comments %}" + (tag or "{% get_comment_list for testapp.author a.id as cl %}")
@@ -119,6 +235,139 @@ class CommentTemplateTagTests(CommentTestCase):
         self.createSomeComments()
         self.verifyGetCommentList("{% load comment_testtags %}{% get_comment_list for a|noop:'x y' as cl %}")
 
+    def createCommentPages(self):
+        a = Article.objects.get(pk=1)
+        now = timezone.now()
+        comments = []
+        for i in range(5):
+            comments.append(Comment.objects.create(
+                content_type=ContentType.objects.get_for_model(a),
+                object_pk=a.pk,
+                user_name="Joe Somebody",
+                comment="Comment %d" % i,
+                # The last two comments share a submit_date.
+                submit_date=now + datetime.timedelta(minutes=min(i, 3)),
+                site=Site.objects.get_current(),
+            ))
+        return a, comments
+
+    def testGetCommentListLimit(self):
+        a, comments = self.createCommentPages()
+        t = "{% load comments %}{% get_comment_list for a as cl limit 2 after cursor %}"
+        pages = []
+        cursor = None
+        while True:
+            with self.assertNumQueries(1):
+                ctx, out = self.render(t, a=a, cursor=cursor)
+            pages.append(list(ctx["cl"]))
+            if not ctx["cl"].has_next:
+                break
+            cursor = ctx["cl"].next_cursor
+        self.assertEqual(pages, [comments[:2], comments[2:4], comments[4:]])
+        self.assertIsNone(ctx["cl"].next_cursor)
+
+    def testGetCommentListLimitFromLiteral(self):
+        a, comments = self.createCommentPages()
+        t = "{% load comments %}{% get_comment_list for testapp.article 1 as cl limit n %}"
+        ctx, out = self.render(t, n=3)
+        self.assertEqual(list(ctx["cl"]), comments[:3])
+
+    def testGetCommentListAfterWithoutLimit(self):
+        a, comments = self.createCommentPages()
+        t = "{% load comments %}{% get_comment_list for a as cl after cursor %}"
+        cursor = encode_cursor(comments[2])
+        ctx, out = self.render(t, a=a, cursor=cursor)
+        self.assertEqual(list(ctx["cl"]), comments[3:])
+
+    def testGetCommentListInvalidCursor(self):
+        a, comments = self.createCommentPages()
+        t = "{% load comments %}{% get_comment_list for a as cl limit 2 after cursor %}"
+        for cursor in ["", "garbage", urlsafe_base64_encode(b"2020-01-01,abc")]:
+            ctx, out = self.render(t, a=a, cursor=cursor)
+            self.assertEqual(list(ctx["cl"]), comments[:2])
+
+    def testGetCommentListInvalidLimit(self):
+        t = "{% load comments %}{% get_comment_list for a as cl limit n %}"
+        for n in [0, "x"]:
+            with self.assertRaises(TemplateSyntaxError):
+                self.render(t, a=Article.objects.get(pk=1), n=n)
+
+    def testGetCommentListValues(self):
+        c1, c2, c3, c4 = self.createSomeComments()
+        t = "{% load comments %}{% get_comment_list for testapp.article a.id as cl values %}"
+        t += "{% for c in cl %}{{ c.id }}:{{ c.name }};{% endfor %}"
+        a = Article.objects.get(pk=1)
+        with self.assertNumQueries(1):
+            ctx, out = self.render(t, a=a)
+        self.assertEqual(out, "%s:Joe Somebody;%s:Frank Nobody;" % (c1.pk, c3.pk))
+        self.assertEqual(ctx["cl"], Comment.objects.rows(Comment.objects.filter(pk__in=[c1.pk, c3.pk])))
+
+    def testGetCommentListAsValues(self):
+        c1, c2, c3, c4 = self.createSomeComments()
+        a = Article.objects.get(pk=1)
+        for t in ("{% load comments %}{% get_comment_list for a as values %}",
+                  "{% load comments %}{% get_comment_list for testapp.article a.id as values %}",
+                  "{% load comments %}{% get_comment_list for a as values limit 2 %}"):
+            ctx, out = self.render(t, a=a)
+            self.assertEqual(list(ctx["values"]), [c1, c3])
+        ctx, out = self.render("{% load comments %}{% get_comment_list for a as cl limit values %}", a=a, values=1)
+        self.assertEqual(list(ctx["cl"]), [c1])
+
+    def testGetCommentListValuesLimit(self):
+        a, comments = self.createCommentPages()
+        t = "{% load comments %}{% get_comment_list for a as cl limit 2 after cursor values %}"
+        ctx, out = self.render(t, a=a)
+        self.assertEqual([c.comment for c in ctx["cl"]], ["Comment 0", "Comment 1"])
+        ctx, out = self.render(t, a=a, cursor=ctx["cl"].next_cursor)
+        self.assertEqual([c.comment for c in ctx["cl"]], ["Comment 2", "Comment 3"])
+
+    def testRenderCommentListLimit(self):
+        a, comments = self.createCommentPages()
+        t = "{% load comments %}{% render_comment_list for a limit 2 %}"
+        ctx, out = self.render(t, a=a)
+        self.assertIn("Comment 1", out)
+        self.assertNotIn("Comment 2", out)
+
+    def testRenderCommentListCache(self):
+        cache.clear()
+        c1, c2, c3, c4 = self.createSomeComments()
+        a = Article.objects.get(pk=1)
+        t = "{% load comments %}{% render_comment_list for a cache %}"
+        ctx, out = self.render(t, a=a)
+        with self.assertNumQueries(0):
+            ctx, cached = self.render(t, a=a)
+        self.assertEqual(cached, out)
+
+        # Changing a comment invalidates the cached list.
+        c1.comment = "Edited"
+        c1.save()
+        ctx, out = self.render(t, a=a)
+        self.assertIn("Edited", out)
+        c1.delete()
+        ctx, out = self.render(t, a=a)
+        self.assertNotIn("Edited", out)
+
+    def testRenderCommentListCacheVariesOnPage(self):
+        cache.clear()
+        a, comments = self.createCommentPages()
+        t = "{% load comments %}{% render_comment_list for a limit 2 after cursor cache %}"
+        ctx, first = self.render(t, a=a)
+        ctx, second = self.render(t, a=a, cursor=encode_cursor(comments[1]))
+        self.assertIn("Comment 0", first)
+        self.assertNotIn("Comment 0", second)
+        self.assertIn("Comment 2", second)
+
+    def testRenderCommentListCacheVariesOnLanguageAndTimezone(self):
+        cache.clear()
+        self.createSomeComments()
+        a = Article.objects.get(pk=1)
+        t = "{% load comments %}{% render_comment_list for a cache %}"
+        self.render(t, a=a)
+        for activate in (functools.partial(translation.override, "fr"),
+                         functools.partial(timezone.override, "Asia/Tokyo")):
+            with activate(), self.assertNumQueries(1):
+                self.render(t, a=a)
+
     def testGetCommentPermalink(self):
         c1, c2, c3, c4 = self.createSomeComments()
         t = "{% load comments %}{% get_comment_list for testapp.author author.id as cl %}"
@@ -161,6 +410,15 @@ class CommentTemplateTagTests(CommentTestCase):
     def testWhitespaceInRenderCommentListTag(self):
         self.testRenderCommentList("{% load comment_testtags %}{% render_comment_list for a|noop:'x y' %}")
 
+    def testContentTypeMemoisedPerNode(self):
+        self.createSomeComments()
+        t = Template("{% load comments %}{% for a in articles %}{% get_comment_count for a as cc %}{% endfor %}")
+        articles = list(Article.objects.all())
+        with mock.patch.object(ContentType.objects, 'get_for_model', wraps=ContentType.objects.get_for_model) as m:
+            t.render(Context({"articles": articles}))
+            t.render(Context({"articles": articles}))
+        self.assertEqual(m.call_count, 1)
+
     def testNumberQueries(self):
         """
         Ensure that the template tags use cached content types to reduce the
@@ -0,0 +1,55 @@
+from pathlib import Path
+from unittest import mock
+
+from django.template import TemplateDoesNotExist
+from django.test.utils import override_settings
+from django.utils.autoreload import file_changed
+
+from django_comments import templating
+
+from . import CommentTestCase
+
+
+class TemplatingTests(CommentTestCase):
+
+    def setUp(self):
+        super().setUp()
+        templating.clear_cache()
+
+    def testGetTemplateNames(self):
+        self.assertEqual(templating.get_template_names("list", "testapp", "article"), [
+            "comments/testapp/article/list.html",
+            "comments/testapp/list.html",
+            "comments/list.html",
+        ])
+        self.assertEqual(templating.get_template_names("preview", "testapp", "article"), [
+            "comments/testapp_article_preview.html",
+            "comments/testapp_preview.html",
+            "comments/testapp/article/preview.html",
+            "comments/testapp/preview.html",
+            "comments/preview.html",
+        ])
+
+    def testSelectTemplateNameCached(self):
+        with mock.patch("django_comments.templating.select_template",
+                        wraps=templating.select_template) as select_mock:
+            self.assertEqual(templating.select_template_name("form", "testapp", "article"), "comments/form.html")
+            self.assertEqual(templating.select_template_name("form", "testapp", "article"), "comments/form.html")
+            self.assertEqual(templating.select_template_name("form", "testapp", "author"), "comments/form.html")
+        self.assertEqual(select_mock.call_count, 2)
+
+    def testSelectTemplateNameMissing(self):
+        with self.assertRaises(TemplateDoesNotExist):
+            templating.select_template_name("missing", "testapp", "article")
+
+    def testClearedOnTemplateChange(self):
+        templating.select_template_name("form", "testapp", "article")
+        file_changed.send(sender=None, file_path=Path("models.py"))
+        self.assertTrue(templating._template_names)
+        file_changed.send(sender=None, file_path=Path("templates/comments/testapp/form.html"))
+        self.assertFalse(templating._template_names)
+
+    def testClearedOnTemplatesSettingChange(self):
+        templating.select_template_name("form", "testapp", "article")
+        with override_settings(TEMPLATES=[]):
+            self.assertFalse(templating._template_names)
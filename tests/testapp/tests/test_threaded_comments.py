@@ -0,0 +1,137 @@
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.sites.models import Site
+from django.template import Context, Template, TemplateSyntaxError
+from django.utils.http import int_to_base36
+
+from django_comments.abstracts import MAX_THREAD_DEPTH
+from django_comments.forms import ThreadedCommentForm
+
+from . import CommentTestCase
+from testapp.models import Article, ThreadedComment
+
+
+class ThreadedCommentTests(CommentTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.article = Article.objects.get(pk=1)
+
+    def createComment(self, parent=None, target=None, comment="Comment"):
+        return ThreadedComment.objects.create(
+            content_object=target or self.article, site_id=1, user_name="Joe", comment=comment, parent=parent,
+        )
+
+    def createThread(self):
+        """
+        Create the threads::
+
+            root1
+                reply1
+                    reply2
+                reply3
+            root2
+        """
+        root1 = self.createComment(comment="root1")
+        reply1 = self.createComment(root1, comment="reply1")
+        root2 = self.createComment(comment="root2")
+        reply2 = self.createComment(reply1, comment="reply2")
+        reply3 = self.createComment(root1, comment="reply3")
+        return root1, reply1, reply2, reply3, root2
+
+    def testSave(self):
+        root1, reply1, reply2, reply3, root2 = self.createThread()
+        self.assertEqual([c.depth for c in (root1, reply1, reply2, reply3, root2)], [0, 1, 2, 1, 0])
+        self.assertEqual(reply2.thread_path, "".join(int_to_base36(c.pk).zfill(10) for c in (root1, reply1, reply2)))
+        self.assertEqual(ThreadedComment.objects.get(pk=reply2.pk).thread_path, reply2.thread_path)
+        # Saving again keeps the path.
+        reply2.comment = "Edited"
+        reply2.save()
+        self.assertEqual(ThreadedComment.objects.get(pk=reply2.pk).thread_path, reply2.thread_path)
+        self.assertEqual(
+            list(ThreadedComment.objects.order_by("thread_path")), [root1, reply1, reply2, reply3, root2])
+
+    def testReplyToOtherObject(self):
+        root = self.createComment()
+        with self.assertRaises(ValueError):
+            self.createComment(root, target=Article.objects.get(pk=2))
+
+    def testMaxDepth(self):
+        comment = None
+        for i in range(MAX_THREAD_DEPTH + 1):
+            comment = self.createComment(comment)
+        self.assertEqual(comment.depth, MAX_THREAD_DEPTH)
+        self.assertEqual(len(comment.thread_path), ThreadedComment._meta.get_field("thread_path").max_length)
+        with self.assertRaises(ValueError):
+            self.createComment(comment)
+
+    def testGetAncestors(self):
+        root1, reply1, reply2, reply3, root2 = self.createThread()
+        with self.assertNumQueries(1):
+            self.assertEqual(list(reply2.get_ancestors()), [root1, reply1])
+        self.assertEqual(list(root1.get_ancestors()), [])
+
+    def testGetDescendants(self):
+        root1, reply1, reply2, reply3, root2 = self.createThread()
+        with self.assertNumQueries(1):
+            self.assertEqual(list(root1.get_descendants()), [reply1, reply2, reply3])
+        self.assertEqual(list(reply1.get_descendants()), [reply2])
+        self.assertEqual(list(root2.get_descendants()), [])
+
+    def testGetCommentTree(self):
+        root1, reply1, reply2, reply3, root2 = self.createThread()
+        reply3.is_public = False
+        reply3.save()
+        with mock.patch("django_comments.get_model", return_value=ThreadedComment):
+            t = Template("{% load comments %}{% get_comment_tree for a as tree %}"
+                         "{% for c in tree %}{{ c.depth }}:{{ c.comment }};{% endfor %}")
+        with self.assertNumQueries(1):
+            out = t.render(Context({"a": self.article}))
+        self.assertEqual(out, "0:root1;1:reply1;2:reply2;0:root2;")
+
+    def testGetCommentTreeRequiresThreadedModel(self):
+        with self.assertRaises(TemplateSyntaxError):
+            Template("{% load comments %}{% get_comment_tree for a as tree %}")
+
+    def testThreadedCommentForm(self):
+        root1, reply1, reply2, reply3, root2 = self.createThread()
+        f = ThreadedCommentForm(self.article, parent=reply1)
+        self.assertEqual(f.initial["parent"], reply1.pk)
+        data = dict(self.getValidData(self.article), parent=str(reply1.pk))
+        with mock.patch("django_comments.forms.get_model", return_value=ThreadedComment):
+            f = ThreadedCommentForm(self.article, data=data)
+            comment = f.get_comment_object()
+        comment.save()
+        self.assertEqual(comment.parent, reply1)
+        self.assertEqual(comment.depth, 2)
+        self.assertEqual(list(root1.get_descendants()), [reply1, reply2, comment, reply3])
+
+    def testThreadedCommentFormInvalidParent(self):
+        other = self.createComment(target=Article.objects.get(pk=2))
+        other_site = ThreadedComment.objects.create(
+            content_object=self.article, site=Site.objects.create(domain="example.org", name="example.org"),
+            user_name="Joe", comment="Comment",
+        )
+        for parent in (str(other.pk), str(other_site.pk), "9999", "invalid"):
+            with mock.patch("django_comments.forms.get_model", return_value=ThreadedComment):
+                f = ThreadedCommentForm(self.article, data=dict(self.getValidData(self.article), parent=parent))
+                self.assertFalse(f.is_valid())
+            self.assertIn("parent", f.errors)
+        f = ThreadedCommentForm(self.article, data=self.getValidData(self.article))
+        self.assertTrue(f.is_valid())
+        self.assertIsNone(f.cleaned_data["parent"])
+
+    def testPostReplyToOtherSiteWithoutSiteId(self):
+        # Without SITE_ID, the posting site comes from the request's host.
+        Site.objects.create(domain="testserver", name="testserver")
+        root = self.createComment()
+        data = dict(self.getValidData(self.article), parent=str(root.pk))
+        with mock.patch("django_comments.get_model", return_value=ThreadedComment), \
+                mock.patch("django_comments.forms.get_model", return_value=ThreadedComment), \
+                mock.patch("django_comments.get_form", return_value=ThreadedCommentForm), \
+                self.settings():
+            del settings.SITE_ID
+            response = self.client.post("/post/", data)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(ThreadedComment.objects.count(), 1)